@@ -1,40 +1,27 @@
-import tempfile
-import re
-import json
+import io
 from typing import Optional
 from PIL import Image
-import google.generativeai as genai
 from pydantic import BaseModel
-from dotenv import load_dotenv
-import os
-# Load environment variables
-load_dotenv()
+from google.genai import types
+from reports.agents.clients import get_genai_client
+from reports.agents.structured_output import generate_json
 
-
-google_api_key = os.getenv("GOOGLE_API_KEY")
-genai.configure(api_key=google_api_key)
+# Shared google-genai client (reports wala registry); gemini-1.5-flash retire ho chuka hai
+GEMINI_MODEL = "gemini-2.5-flash"
 generation_config = {
     "temperature": 0.7,
     "top_p": 1,
-    "top_k": 0,
     "max_output_tokens": 4096,
+    "safety_settings": [
+        {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+        {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+        {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+        {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    ],
 }
 
-safety_settings = [
-    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-]
-
-report_model = genai.GenerativeModel(
-    "gemini-1.5-flash",
-    generation_config=generation_config,
-    safety_settings=safety_settings
-)
 
-
-# Pydantic model for barcode output
+# Pydantic model for barcode output (Gemini response_schema bhi yahi hai)
 class BarcodeDetails(BaseModel):
     barcode_number: str
 
@@ -58,28 +45,18 @@ def scan_barcode_and_number(image_file) -> str:
     returns: detected barcode number as string, or "No barcode detected"
     """
     try:
-        # Convert image bytes to PIL Image
-        image = Image.open(image_file)
-
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(suffix=".jpeg", delete=True) as tmp_file:
-            image.save(tmp_file.name, format="JPEG")
-
-            # Upload file to Google LLM
-            uploaded_file = genai.upload_file(path=tmp_file.name)
-
-            # Call your report model (LLM) to extract barcode
-            response = report_model.generate_content([system_prompt, uploaded_file])
-
-            # Parse LLM response
-            if hasattr(response, "text"):
-                clean_text = re.sub(r"```(?:json)?", "", response.text).strip("` \n")
-                match = re.search(r"(\{.*\})", clean_text, re.DOTALL)
-                if match:
-                    data = json.loads(match.group(1))
-                    barcode_details = BarcodeDetails(**data)
-                    print(barcode_details)
-                    return barcode_details.barcode_number
+        # Image memory me hi JPEG encode hoke inline jati hai (temp file / upload nahi)
+        buffer = io.BytesIO()
+        Image.open(image_file).convert("RGB").save(buffer, format="JPEG")
+        image_part = types.Part.from_bytes(data=buffer.getvalue(), mime_type="image/jpeg")
+
+        barcode_details: Optional[BarcodeDetails] = generate_json(
+            get_genai_client(), GEMINI_MODEL, [system_prompt, image_part], BarcodeDetails,
+            kind="barcode", config=generation_config,
+        )
+        if barcode_details:
+            print(barcode_details)
+            return barcode_details.barcode_number
 
     except Exception as e:
         print(f"Error extracting barcode: {e}")
@@ -3,7 +3,6 @@ from rest_framework.response import Response
 from rest_framework import status
 from utils.usercheck import authenticate_request
 from .diet import ProductAnalysis
-from .scanning import scan_barcode_and_number
 
 # Create your views here.
 class DietViewSet(APIView):
@@ -13,6 +12,8 @@ class DietViewSet(APIView):
         if not image:
             return Response({"error": "No image provided"}, status=status.HTTP_400_BAD_REQUEST)
         try :
+            # Gemini SDK heavy hai, sirf scan request par import karo (worker boot fast rehta hai)
+            from .scanning import scan_barcode_and_number
             barcode = scan_barcode_and_number(image)
             print(barcode)
         except Exception as e:
@@ -0,0 +1,41 @@
+import os
+from typing import List
+from langchain_core.prompts import ChatPromptTemplate
+from .clients import get_chat_model
+from .tokens import truncate_tokens
+
+# ------------------------------
+# Chat history compaction
+# Window se bahar gaye purane turns ek chhote running summary me fold hote hain.
+# ------------------------------
+CHAT_SUMMARY_MODEL = "gpt-4o-mini"
+CHAT_SUMMARY_TOKEN_BUDGET = int(os.getenv("CHAT_SUMMARY_TOKEN_BUDGET", "400"))
+
+chat_summary_prompt = ChatPromptTemplate.from_template("""
+    You keep a short memory of a conversation between a user and a health assistant.
+
+    Current memory (may be empty):
+    {summary}
+
+    Older messages to add, oldest first:
+    {messages}
+
+    Rewrite the memory so it includes these messages. Keep what the user shared about
+    themselves, their questions and concerns, and advice already given. Drop greetings
+    and small talk. Stay under {word_limit} words. Plain text, no bullet points.
+    """)
+
+
+def compact_chat_history(summary: str, messages: List[dict], token_budget: int = None) -> str:
+    """messages: [{"role": "human"/"ai", "content": ...}] -> updated running summary."""
+    token_budget = token_budget or CHAT_SUMMARY_TOKEN_BUDGET
+    if not messages:
+        return summary
+
+    chain = chat_summary_prompt | get_chat_model(CHAT_SUMMARY_MODEL, temperature=0.2)
+    response = chain.invoke({
+        "summary": summary or "(empty)",
+        "messages": "\n".join(f"{'User' if m['role'] == 'human' else 'Assistant'}: {m['content']}" for m in messages),
+        "word_limit": int(token_budget * 0.6),
+    })
+    return truncate_tokens(response.content.strip(), token_budget, CHAT_SUMMARY_MODEL)
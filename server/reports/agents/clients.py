@@ -0,0 +1,75 @@
+import os
+import threading
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ------------------------------
+# Process-wide client registry
+# Clients pehli baar use hone par bante hain (import time par nahi), phir har agent/view
+# wahi instance reuse karta hai. OpenAI models ek shared pooled httpx client use karte hain,
+# to har request par naya TLS handshake nahi hota.
+# ------------------------------
+HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "10"))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("LLM_HTTP_TIMEOUT_SECONDS", "120"))
+
+_clients = {}
+_lock = threading.RLock()
+
+
+def _get_or_create(key, factory):
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = factory()
+                _clients[key] = client
+    return client
+
+
+def get_http_client():
+    """Shared keep-alive connection pool for all OpenAI chat models."""
+    def factory():
+        import httpx
+        return httpx.Client(
+            limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE),
+            timeout=HTTP_TIMEOUT_SECONDS,
+        )
+    return _get_or_create("http", factory)
+
+
+def get_genai_client():
+    def factory():
+        from google import genai
+        return genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+    return _get_or_create("genai", factory)
+
+
+def get_chat_model(model: str, temperature: Optional[float] = None):
+    """One ChatOpenAI instance per (model, temperature), sab ek hi HTTP pool par."""
+    def factory():
+        from langchain_openai import ChatOpenAI
+        kwargs = {"model": model, "http_client": get_http_client()}
+        if temperature is not None:
+            kwargs["temperature"] = temperature
+        return ChatOpenAI(**kwargs)
+    return _get_or_create(("chat", model, temperature), factory)
+
+
+def get_embeddings_model(model: str, dimensions: Optional[int] = None):
+    def factory():
+        from langchain_openai import OpenAIEmbeddings
+        return OpenAIEmbeddings(model=model, dimensions=dimensions, http_client=get_http_client())
+    return _get_or_create(("embeddings", model, dimensions), factory)
+
+
+def reset_clients():
+    """Registry khali karo (tests ya API key rotate hone par)."""
+    with _lock:
+        http_client = _clients.pop("http", None)
+        _clients.clear()
+    if http_client is not None:
+        http_client.close()
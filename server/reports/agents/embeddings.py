@@ -0,0 +1,86 @@
+import hashlib
+import math
+import os
+import re
+from typing import List
+from .clients import get_embeddings_model
+
+# ------------------------------
+# Pluggable embedders (report RAG ke liye)
+# Har embedder ka `name` vector table ka naam decide karta hai, to embedder badalne par
+# purane vectors mix nahi hote. Sab embedders L2-normalized vectors dete hain.
+# ------------------------------
+REPORT_EMBEDDER = os.getenv("REPORT_EMBEDDER", "openai")   # openai / hashing
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "256"))
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(v * v for v in vector))
+    return [v / norm for v in vector] if norm else vector
+
+
+class HashingEmbedder:
+    """
+    Local deterministic embedder (feature hashing of words + word bigrams).
+    Koi API call nahi: tests, offline dev, ya OpenAI key ke bina chalane ke liye.
+    """
+
+    def __init__(self, dimensions: int = EMBEDDING_DIMENSIONS):
+        self.dimensions = dimensions
+        self.name = f"hashing_{dimensions}"
+
+    def _features(self, text: str) -> List[str]:
+        words = re.findall(r"[a-z0-9]+(?:\.[0-9]+)?", text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for feature in self._features(text):
+            # hash() har process me alag hota hai, blake2b stable hai
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        return _normalize(vector)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed(text)
+
+
+class OpenAIEmbedder:
+    def __init__(self, model: str = EMBEDDING_MODEL, dimensions: int = EMBEDDING_DIMENSIONS):
+        self.model = model
+        self.dimensions = dimensions
+        self.name = re.sub(r"[^a-z0-9]+", "_", f"openai_{model}_{dimensions}".lower())
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [_normalize(v) for v in get_embeddings_model(self.model, self.dimensions).embed_documents(texts)]
+
+    def embed_query(self, text: str) -> List[float]:
+        return _normalize(get_embeddings_model(self.model, self.dimensions).embed_query(text))
+
+
+EMBEDDERS = {
+    "openai": OpenAIEmbedder,
+    "hashing": HashingEmbedder,
+}
+
+_embedder = None
+
+
+def get_embedder():
+    global _embedder
+    if _embedder is None:
+        if REPORT_EMBEDDER not in EMBEDDERS:
+            raise ValueError(f"Unknown REPORT_EMBEDDER {REPORT_EMBEDDER!r}, expected one of {list(EMBEDDERS)}")
+        _embedder = EMBEDDERS[REPORT_EMBEDDER]()
+    return _embedder
+
+
+def set_embedder(embedder):
+    """Embedder replace karo (tests me HashingEmbedder inject karne ke liye)."""
+    global _embedder
+    _embedder = embedder
@@ -1,23 +1,20 @@
-import tempfile
 from PIL import Image
-import fitz
-from dotenv import load_dotenv
-import os
-import re
 import json
 from pydantic import BaseModel
 from typing import List, Optional
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
 
-from google import genai
+from .clients import get_chat_model, get_genai_client
+from .page_rendering import RenderedPage, render_image, render_pdf_pages
+from .page_pool import map_pages, with_backoff
+from .page_cache import cache_kind, cached_page_extraction
+from .structured_output import generate_json
 
 # ------------------------------
-# Load API key
+# Models (clients registry se lazily bante hain)
 # ------------------------------
-load_dotenv()
-google_api_key = os.getenv("GOOGLE_API_KEY")
-client = genai.Client(api_key=google_api_key)
+GEMINI_MODEL = "gemini-2.5-flash"
+SUMMARY_MODEL = "gpt-3.5-turbo"
 
 # ------------------------------
 # Pydantic models
@@ -59,51 +56,52 @@ Do NOT explain anything. Do NOT include code blocks. Respond with valid JSON onl
 """
 
 # ------------------------------
-# Models
+# Extract from a single rendered page
 # ------------------------------
-summary_model = ChatOpenAI(temperature=0.7)
-
-# ------------------------------
-# Extract from a single image
-# ------------------------------
-def extract_report_details_from_image(image: Image.Image) -> Optional[ReportDetails]:
+@cached_page_extraction(
+    cache_kind("details", GEMINI_MODEL, system_prompt),
+    dump=lambda details: details.model_dump(),
+    load=lambda data: ReportDetails(**data),
+)
+def extract_report_details_from_page(page: RenderedPage) -> Optional[ReportDetails]:
     try:
-        with tempfile.NamedTemporaryFile(suffix=".jpeg", delete=True) as tmp_file:
-            image.save(tmp_file.name, format="JPEG")
-
-            # Upload image file to Gemini
-            uploaded_file = client.files.upload(file=tmp_file.name)
-
-            # Generate content using gemini-2.5-flash
-            response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=[system_prompt, uploaded_file]
-            )
-
-            if hasattr(response, "text"):
-                clean_text = re.sub(r"```(?:json)?", "", response.text).strip("` \n")
-                match = re.search(r"(\{.*\})", clean_text, re.DOTALL)
-                if match:
-                    data = json.loads(match.group(1))
-                    return ReportDetails(**data)
+        client = get_genai_client()
+
+        # Page image inline jati hai, Part dono extractors share karte hain
+        page_image = with_backoff(page.gemini_part, client)
+
+        # ReportDetails schema ke saath (parse fail ho to ek repair call)
+        details = generate_json(client, GEMINI_MODEL, [system_prompt, page_image], ReportDetails, kind="details")
+        page.failed = page.failed or details is None
+        return details
     except Exception as e:
         print(f"Error: {e}")
+        page.failed = True
     return None
 
+def extract_report_details_from_image(image: Image.Image) -> Optional[ReportDetails]:
+    return extract_report_details_from_page(render_image(image))
+
 # ------------------------------
 # Extract from PDF
 # ------------------------------
-def extract_report_from_pdf(pdf_path: str) -> List[PageReport]:
+def extract_report_from_pages(pages: List[RenderedPage], on_page=None) -> List[PageReport]:
+    """on_page(PageReport) har page ready hote hi call hota hai (streaming ke liye)."""
+    def notify(page, details):
+        if on_page and details:
+            on_page(PageReport(page_number=page.page_number, details=details))
+
+    # Pages parallel me process hote hain, order page_number wala hi rehta hai
+    extracted = map_pages(extract_report_details_from_page, pages, on_result=notify)
     results = []
-    doc = fitz.open(pdf_path)
-    for i, page in enumerate(doc, start=1):
-        pix = page.get_pixmap()
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        details = extract_report_details_from_image(img)
+    for page, details in zip(pages, extracted):
         if details:
-            results.append(PageReport(page_number=i, details=details))
+            results.append(PageReport(page_number=page.page_number, details=details))
     return results
 
+def extract_report_from_pdf(pdf_path: str) -> List[PageReport]:
+    return extract_report_from_pages(render_pdf_pages(pdf_path))
+
 # ------------------------------
 # Generate overall summary
 # ------------------------------
@@ -122,7 +120,7 @@ def generate_report_summary(page_reports: List[PageReport]) -> str:
     and any follow-up questions. Keep it professional.
     """
     # Use .invoke() instead of deprecated __call__()
-    response = summary_model.invoke([HumanMessage(content=prompt)])
+    response = get_chat_model(SUMMARY_MODEL, temperature=0.7).invoke([HumanMessage(content=prompt)])
     return response.content.strip()
 
 # ------------------------------
@@ -0,0 +1,226 @@
+import json
+from pydantic import BaseModel, PrivateAttr, ValidationError
+from typing import List, Optional, Tuple
+
+from .clients import get_genai_client
+from .modes import COMBINED_MODE, EXTRACTION_MODES, DEFAULT_EXTRACTION_MODE
+from .page_rendering import RenderedPage, render_pdf_pages
+from .page_pool import map_pages, with_backoff
+from .page_cache import cache_kind, cached_page_extraction
+from .structured_output import generate_json
+from .extracting_basic_details import ReportDetails, PageReport, extract_report_from_pages, extract_report_details_from_page
+from .extracting_json_details import TestResult, PageResults, extract_medical_from_pages
+from .text_layer import TEXT_METHOD, VISION_METHOD, TEXT_LAYER_VISION_DETAILS, extract_from_text_layer
+from .page_filter import filter_pages
+
+# ------------------------------
+# Models (clients registry se lazily bante hain)
+# ------------------------------
+GEMINI_MODEL = "gemini-2.5-flash"
+
+# ------------------------------
+# Pydantic models
+# ------------------------------
+class CombinedPageDetails(BaseModel):
+    details: Optional[ReportDetails] = None
+    tests: List[TestResult] = []
+    # Validation me gire hue test rows; > 0 ho to page failed (adhoora result cache nahi hota)
+    _dropped_tests: int = PrivateAttr(default=0)
+
+# ------------------------------
+# System prompt
+# ------------------------------
+system_prompt = """
+You are a medical report parser. From this medical report image extract BOTH:
+
+1. details:
+- disease_name
+- doctor_name
+- hospital_address
+- end (True if report ends, else False)
+- questions (list any questions if needed)
+
+2. tests: every test value on the page with its Name, Found value and reference Range.
+
+Please respond ONLY in pure JSON using this format:
+
+{
+    "details": {
+        "disease_name": "Example Disease",
+        "doctor_name": "Dr. ABC",
+        "hospital_address": "XYZ Hospital",
+        "end": false,
+        "questions": ["Question 1", "Question 2"]
+    },
+    "tests": [
+        {
+            "Name": "Glycogen",
+            "Found": 120,
+            "Range": "90-110"
+        }
+    ]
+}
+
+Do NOT explain anything. Do NOT include code blocks. Respond with valid JSON only.
+"""
+
+# ------------------------------
+# Validation: combined JSON -> existing models
+# ------------------------------
+def parse_combined_response(data: dict) -> CombinedPageDetails:
+    """
+    Details aur har test row alag alag validate hote hain, taaki ek kharab test row
+    se page ki details ya baaki tests na chale jayein (aur ulta bhi).
+    """
+    if not isinstance(data, dict):
+        raise TypeError(f"Expected a JSON object, got {type(data).__name__}")
+
+    details = None
+    try:
+        if data.get("details"):
+            details = ReportDetails(**data["details"])
+    except (ValidationError, TypeError) as e:
+        print(f"Invalid details: {e}")
+
+    tests, dropped = [], 0
+    for item in data.get("tests") or []:
+        try:
+            tests.append(TestResult(**item))
+        except (ValidationError, TypeError) as e:
+            dropped += 1
+            print(f"Invalid test row {item!r}: {e}")
+
+    combined = CombinedPageDetails(details=details, tests=tests)
+    combined._dropped_tests = dropped
+    return combined
+
+def split_combined(
+    page_number: int, combined: Optional[CombinedPageDetails]
+) -> Tuple[Optional[PageReport], Optional[PageResults]]:
+    if combined is None:
+        return None, None
+    page_report = PageReport(page_number=page_number, details=combined.details) if combined.details else None
+    page_results = PageResults(page_number=page_number, tests=combined.tests) if combined.tests else None
+    return page_report, page_results
+
+# ------------------------------
+# Extract from a single rendered page
+# ------------------------------
+@cached_page_extraction(
+    cache_kind("combined", GEMINI_MODEL, system_prompt),
+    dump=lambda combined: combined.model_dump(),
+    load=lambda data: CombinedPageDetails(**data),
+)
+def extract_combined_from_page(page: RenderedPage) -> Optional[CombinedPageDetails]:
+    try:
+        client = get_genai_client()
+        page_image = with_backoff(page.gemini_part, client)
+
+        # Schema Gemini ko constrain karta hai; validation phir bhi details/tests alag alag
+        combined = generate_json(
+            client, GEMINI_MODEL, [system_prompt, page_image], CombinedPageDetails,
+            kind="combined", parse=parse_combined_response,
+        )
+        page.failed = page.failed or combined is None or combined._dropped_tests > 0
+        return combined
+    except Exception as e:
+        print(f"Error: {e}")
+        page.failed = True
+    return None
+
+# ------------------------------
+# Extract from PDF
+# ------------------------------
+def extract_combined_from_pages(pages: List[RenderedPage], on_page=None) -> Tuple[List[PageReport], List[PageResults]]:
+    def notify(page, combined):
+        if on_page:
+            for item in split_combined(page.page_number, combined):
+                if item:
+                    on_page(item)
+
+    page_reports, page_results = [], []
+    for page, combined in zip(pages, map_pages(extract_combined_from_page, pages, on_result=notify)):
+        page_report, page_result = split_combined(page.page_number, combined)
+        if page_report:
+            page_reports.append(page_report)
+        if page_result:
+            page_results.append(page_result)
+    return page_reports, page_results
+
+def extract_text_layer_pages(pages: List[RenderedPage], on_page=None) -> Tuple[List[PageReport], List[PageResults], List[RenderedPage]]:
+    """
+    Digital pages ke tests text layer se hi parse karo (test extraction ki API call nahi).
+    Details: TEXT_LAYER_VISION_DETAILS on ho to details-only vision call (disease_name / questions
+    text me nahi milte), fail ho to text wali details.
+    Returns (page_reports, page_results, remaining) - remaining pages text se parse nahi hue.
+    """
+    parsed_pages, remaining = [], []
+    for page in pages:
+        parsed = extract_from_text_layer(page.words)
+        if parsed is None:
+            remaining.append(page)
+        else:
+            page.method = TEXT_METHOD
+            parsed_pages.append((page, parsed))
+
+    text_pages = [page for page, _ in parsed_pages]
+    vision_details = map_pages(extract_report_details_from_page, text_pages) if TEXT_LAYER_VISION_DETAILS else [None] * len(text_pages)
+
+    page_reports, page_results = [], []
+    for (page, (text_details, tests)), details in zip(parsed_pages, vision_details):
+        for item, bucket in (
+            (PageReport(page_number=page.page_number, details=details or text_details), page_reports),
+            (PageResults(page_number=page.page_number, tests=tests), page_results),
+        ):
+            bucket.append(item)
+            if on_page:
+                on_page(item)
+    return page_reports, page_results, remaining
+
+def extract_pages(
+    pages: List[RenderedPage], mode: Optional[str] = None, on_page=None
+) -> Tuple[List[PageReport], List[PageResults]]:
+    """
+    Pehle text layer (digital PDFs), phir blank/boilerplate pages skip, baaki pages vision se:
+    mode = "combined": ek call per page
+    mode = "two_call": details aur tests ke liye alag calls (compare karne ke liye)
+    on_page(PageReport | PageResults) har page ka result ready hote hi call hota hai.
+    """
+    mode = mode or DEFAULT_EXTRACTION_MODE
+    if mode not in EXTRACTION_MODES:
+        raise ValueError(f"Unknown extraction mode: {mode}")
+
+    page_reports, page_results, remaining = extract_text_layer_pages(pages, on_page=on_page)
+
+    # Blank / disclaimer / signature pages par model call mat karo.
+    # Sab kuch hi skip ho raha ho to filter par bharosa nahi, sab vision ko bhejo.
+    vision_pages = filter_pages(remaining)
+    if not vision_pages and not page_reports and not page_results:
+        vision_pages = remaining
+    for page in vision_pages:
+        page.method, page.skip_reason = VISION_METHOD, None
+
+    if vision_pages:
+        if mode == COMBINED_MODE:
+            vision_reports, vision_results = extract_combined_from_pages(vision_pages, on_page=on_page)
+        else:
+            vision_reports = extract_report_from_pages(vision_pages, on_page=on_page)
+            vision_results = extract_medical_from_pages(vision_pages, on_page=on_page)
+        page_reports += vision_reports
+        page_results += vision_results
+
+    by_page = lambda item: item.page_number
+    return sorted(page_reports, key=by_page), sorted(page_results, key=by_page)
+
+# ------------------------------
+# Main: dono modes compare karo
+# ------------------------------
+if __name__ == "__main__":
+    pages = render_pdf_pages("test.pdf")
+    for mode in EXTRACTION_MODES:
+        page_reports, page_results = extract_pages(pages, mode=mode)
+        print(f"\n===== {mode} =====")
+        print(json.dumps({
+            "structured_details": [r.model_dump() for r in page_reports],
+            "test_details": [r.model_dump() for r in page_results],
+        }, indent=2))
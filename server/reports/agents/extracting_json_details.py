@@ -1,22 +1,21 @@
-import tempfile
 from PIL import Image
-import fitz
-from dotenv import load_dotenv
 import os
-import re
 import json
 from pydantic import BaseModel
 from typing import List, Optional
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
-from google import genai
+from .clients import get_chat_model, get_genai_client
+from .page_rendering import RenderedPage, render_image, render_pdf_pages
+from .page_pool import map_pages, with_backoff
+from .page_cache import cache_kind, cached_page_extraction
+from .structured_output import generate_json
+from .tokens import chunk_by_tokens, count_json_tokens, count_tokens
 
 # ------------------------------
-# Load API key
+# Models (clients registry se lazily bante hain)
 # ------------------------------
-load_dotenv()
-google_api_key = os.getenv("GOOGLE_API_KEY")
-client = genai.Client(api_key=google_api_key)
+GEMINI_MODEL = "gemini-2.5-flash"
+SUMMARY_MODEL = "gpt-3.5-turbo"
 
 # ------------------------------
 # Pydantic models
@@ -52,62 +51,61 @@ Respond with valid, parsable JSON only.
 """
 
 # ------------------------------
-# Extract from a single image
+# Extract from a single rendered page
 # ------------------------------
-def extract_medical_json_from_image(image: Image.Image):
+@cached_page_extraction(
+    cache_kind("tests", GEMINI_MODEL, system_prompt),
+    dump=lambda tests: [t.model_dump() for t in tests],
+    load=lambda data: [TestResult(**item) for item in data],
+)
+def extract_medical_json_from_page(page: RenderedPage) -> List[TestResult]:
     try:
-        # Save image to temp file
-        with tempfile.NamedTemporaryFile(suffix=".jpeg", delete=True) as tmp_file:
-            image.save(tmp_file.name, format="JPEG")
-
-            # Upload file using new method
-            uploaded_file = client.files.upload(file=tmp_file.name)
-
-            # Send prompt + uploaded file to Gemini
-            response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=[system_prompt, uploaded_file]
-            )
-
-            if hasattr(response, "text"):
-                clean_text = re.sub(r"```(?:json)?", "", response.text).strip("` \n")
-                match = re.search(r"(\{.*\}|\[.*\])", clean_text, re.DOTALL)
-                if match:
-                    data = json.loads(match.group(1))
-                    return [TestResult(**item) for item in data]
+        client = get_genai_client()
+
+        # Reuse the Part built by the basic details pass (or build it now if first)
+        page_image = with_backoff(page.gemini_part, client)
+
+        # Send prompt + page image to Gemini, list[TestResult] schema ke saath
+        tests = generate_json(client, GEMINI_MODEL, [system_prompt, page_image], list[TestResult], kind="tests")
+        page.failed = page.failed or tests is None
+        return tests or []
     except Exception as e:
         print(f"Error: {e}")
+        page.failed = True
     return []
 
+def extract_medical_json_from_image(image: Image.Image):
+    return extract_medical_json_from_page(render_image(image))
+
 # ------------------------------
 # Extract from PDF
 # ------------------------------
-def extract_medical_from_pdf(pdf_path: str) -> List[PageResults]:
+def extract_medical_from_pages(pages: List[RenderedPage], on_page=None) -> List[PageResults]:
+    """on_page(PageResults) har page ready hote hi call hota hai (streaming ke liye)."""
+    def notify(page, tests):
+        if on_page and tests:
+            on_page(PageResults(page_number=page.page_number, tests=tests))
+
+    # Pages parallel me process hote hain, order page_number wala hi rehta hai
+    extracted = map_pages(extract_medical_json_from_page, pages, on_result=notify)
     results = []
-    doc = fitz.open(pdf_path)
-    for i, page in enumerate(doc, start=1):
-        pix = page.get_pixmap()
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        tests = extract_medical_json_from_image(img)
+    for page, tests in zip(pages, extracted):
         if tests:
-            results.append(PageResults(page_number=i, tests=tests))
+            results.append(PageResults(page_number=page.page_number, tests=tests))
     return results
 
+def extract_medical_from_pdf(pdf_path: str) -> List[PageResults]:
+    return extract_medical_from_pages(render_pdf_pages(pdf_path))
+
 # ------------------------------
-# Generate overall summary
+# Generate overall summary (map-reduce)
 # ------------------------------
-summary_model = ChatOpenAI(temperature=0.7)
-
-def generate_report_summary(page_results: List[PageResults]) -> str:
-    # Use model_dump() instead of deprecated dict()
-    data_for_summary = [r.model_dump() for r in page_results]
-
-    CHUNK_SIZE = 5
-    all_chunks = [data_for_summary[i:i+CHUNK_SIZE] for i in range(0, len(data_for_summary), CHUNK_SIZE)]
-    summaries = []
+# Chunk size ab pages se nahi, tokens se decide hota hai
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "3000"))
+SUMMARY_MAX_CONCURRENCY = int(os.getenv("SUMMARY_MAX_CONCURRENCY", "4"))
 
-    for chunk in all_chunks:
-        prompt = f"""
+def _chunk_prompt(chunk) -> str:
+    return f"""
         You are a medical report summarizer.
         Here are the extracted test values from a chunk of pages:
 
@@ -118,12 +116,53 @@ def generate_report_summary(page_results: List[PageResults]) -> str:
         and any recommendations if applicable.
         Keep the tone professional.
         """
-        # Use .invoke() instead of deprecated __call__()
-        response = summary_model.invoke([HumanMessage(content=prompt)])
-        summaries.append(response.content.strip())
 
-    final_summary = "\n\n".join(summaries)
-    return final_summary
+def _reduce_prompt(summaries: List[str]) -> str:
+    joined = "\n\n---\n\n".join(summaries)
+    return f"""
+        You are a medical report summarizer.
+        Below are summaries of consecutive parts of the same medical report:
+
+        {joined}
+
+        Merge them into ONE coherent, human-readable summary of the whole report.
+        Keep every abnormal value and recommendation, remove repetition,
+        and keep the tone professional.
+        """
+
+def _invoke_all(prompts: List[str]) -> List[str]:
+    # Map step: saare chunks ek saath (bounded concurrency)
+    responses = get_chat_model(SUMMARY_MODEL, temperature=0.7).batch(
+        [[HumanMessage(content=prompt)] for prompt in prompts],
+        config={"max_concurrency": SUMMARY_MAX_CONCURRENCY},
+    )
+    return [response.content.strip() for response in responses]
+
+def generate_report_summary(page_results: List[PageResults]) -> str:
+    # Use model_dump() instead of deprecated dict()
+    data_for_summary = [r.model_dump() for r in page_results]
+    if not data_for_summary:
+        return ""
+
+    model_name = SUMMARY_MODEL
+    chunks = chunk_by_tokens(
+        data_for_summary, SUMMARY_CHUNK_TOKENS,
+        measure=lambda page: count_json_tokens(page, model_name),
+    )
+    summaries = _invoke_all([_chunk_prompt(chunk) for chunk in chunks])
+
+    # Reduce step: jab tak ek summary na bache, budget ke hisaab se merge karte raho
+    while len(summaries) > 1:
+        groups = chunk_by_tokens(
+            summaries, SUMMARY_CHUNK_TOKENS,
+            measure=lambda text: count_tokens(text, model_name),
+        )
+        if len(groups) == len(summaries):
+            # Har summary budget jitni badi hai, to pairs me merge karo taaki loop aage badhe
+            groups = [summaries[i:i + 2] for i in range(0, len(summaries), 2)]
+        summaries = _invoke_all([_reduce_prompt(group) for group in groups])
+
+    return summaries[0]
 
 # ------------------------------
 # Main
@@ -0,0 +1,52 @@
+import os
+from typing import List
+from langchain_core.prompts import ChatPromptTemplate
+from .clients import get_chat_model
+from .tokens import chunk_by_tokens, count_tokens, truncate_tokens
+
+# ------------------------------
+# Rolling health profile (chatbot context)
+# Har nayi report purane profile me fold hoti hai, poori history dobara nahi padhi jati.
+# ------------------------------
+HEALTH_PROFILE_MODEL = "gpt-4o-mini"
+HEALTH_PROFILE_TOKEN_BUDGET = int(os.getenv("HEALTH_PROFILE_TOKEN_BUDGET", "600"))
+# Ek call me kitne tokens ki nayi report summaries fold hongi (backfill ke liye)
+HEALTH_PROFILE_INPUT_TOKENS = int(os.getenv("HEALTH_PROFILE_INPUT_TOKENS", "6000"))
+
+health_profile_prompt = ChatPromptTemplate.from_template("""
+    You maintain a condensed health profile of one patient for a health assistant chatbot.
+
+    Current profile (may be empty):
+    {profile}
+
+    New medical report summaries, oldest first:
+    {new_reports}
+
+    Rewrite the profile so it includes the new reports. Keep known conditions, chronic
+    abnormal values and their trend over time, medications, doctors and recommendations.
+    Drop one-off normal values and repeated details. Newer findings win over older ones.
+    Stay under {word_limit} words. Plain text, no bullet points, no JSON.
+    """)
+
+
+def update_health_profile_text(profile: str, new_summaries: List[str], token_budget: int = None) -> str:
+    """
+    Purane profile + nayi report summaries -> naya profile, token_budget ke andar.
+    Bahut saari summaries ho (pehli baar backfill) to chunks me fold karta hai.
+    """
+    token_budget = token_budget or HEALTH_PROFILE_TOKEN_BUDGET
+    summaries = [s.strip() for s in new_summaries if s and s.strip()]
+    if not summaries:
+        return profile
+
+    chain = health_profile_prompt | get_chat_model(HEALTH_PROFILE_MODEL, temperature=0.2)
+    measure = lambda s: count_tokens(s, HEALTH_PROFILE_MODEL)
+    for chunk in chunk_by_tokens(summaries, HEALTH_PROFILE_INPUT_TOKENS, measure):
+        response = chain.invoke({
+            "profile": profile or "(empty)",
+            "new_reports": "\n\n".join(f"Report {i + 1}: {s}" for i, s in enumerate(chunk)),
+            # ~0.75 words per token, thoda margin ke saath
+            "word_limit": int(token_budget * 0.6),
+        })
+        profile = truncate_tokens(response.content.strip(), token_budget, HEALTH_PROFILE_MODEL)
+    return profile
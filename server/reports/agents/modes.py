@@ -0,0 +1,15 @@
+import os
+
+# ------------------------------
+# Pipeline modes
+# Sirf constants: views/serializers inhe bina kisi SDK ko import kiye use kar sakte hain.
+# ------------------------------
+TWO_CALL_MODE = "two_call"    # alag alag details + tests prompt (purana path)
+COMBINED_MODE = "combined"    # ek hi Gemini call me dono
+EXTRACTION_MODES = (TWO_CALL_MODE, COMBINED_MODE)
+DEFAULT_EXTRACTION_MODE = os.getenv("REPORT_EXTRACTION_MODE", TWO_CALL_MODE)
+
+MULTI_STAGE_SUMMARY = "multi_stage"   # basic -> chunked json -> final -> youtube query (4+ calls)
+FAST_SUMMARY = "fast"                 # 1 structured call, bade reports ke liye multi_stage fallback
+SUMMARY_MODES = (MULTI_STAGE_SUMMARY, FAST_SUMMARY)
+DEFAULT_SUMMARY_MODE = os.getenv("REPORT_SUMMARY_MODE", MULTI_STAGE_SUMMARY)
@@ -1,13 +1,16 @@
 import os
-from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
+import json
+from typing import Optional
+from pydantic import BaseModel
 from langchain_core.prompts import ChatPromptTemplate
+from .clients import get_chat_model
+from .tokens import count_tokens
 
-load_dotenv()
-openai_api_key = os.getenv("OPENAI_API_KEY")
+# OpenAI LLM (fast aur sasta model), registry se lazily banta hai
+SUMMARY_LLM_MODEL = "gpt-4o-mini"
 
-# OpenAI LLM (fast aur sasta model)
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.4, api_key=openai_api_key)
+def get_llm():
+    return get_chat_model(SUMMARY_LLM_MODEL, temperature=0.4)
 
 def generate_final_summary(basic_details: dict, summary: str) -> str:
     """
@@ -26,10 +29,54 @@ def generate_final_summary(basic_details: dict, summary: str) -> str:
     Return the final summary in plain text (no bullet points, no JSON).
     """)
 
-    chain = prompt | llm
+    chain = prompt | get_llm()
     response = chain.invoke({"basic_details": basic_details, "summary": summary})
     return response.content.strip()
 
+# ------------------------------
+# Fast summary: ek structured call me final summary + YouTube query
+# ------------------------------
+# Input itne tokens se zyada ho to fast mode skip (context + output ke liye jagah chahiye)
+FAST_SUMMARY_TOKEN_BUDGET = int(os.getenv("FAST_SUMMARY_TOKEN_BUDGET", "12000"))
+
+class FastSummary(BaseModel):
+    final_summary: str
+    youtube_query: str
+
+fast_summary_prompt = ChatPromptTemplate.from_template("""
+    You are a medical report summarizer.
+    Here are the extracted details and test values from all pages of a medical report:
+
+    Report details:
+    {structured_details}
+
+    Test values:
+    {test_details}
+
+    1. final_summary: one clear professional summary of the whole report, mentioning
+       diseases, doctors, hospital info, main findings, abnormal values and recommendations.
+       Plain text (no bullet points, no JSON).
+    2. youtube_query: a concise YouTube search query to find yoga and exercise videos
+       relevant to this report. Only the query, no extra explanation.
+    """)
+
+def generate_fast_summary(structured_details: list, test_details: list) -> Optional[FastSummary]:
+    """
+    Returns None jab report context budget se bada ho, caller multi-stage chain par fallback kare.
+    """
+    inputs = {
+        "structured_details": json.dumps(structured_details, indent=2),
+        "test_details": json.dumps(test_details, indent=2),
+    }
+    if count_tokens(inputs["structured_details"] + inputs["test_details"], SUMMARY_LLM_MODEL) > FAST_SUMMARY_TOKEN_BUDGET:
+        return None
+
+    chain = fast_summary_prompt | get_llm().with_structured_output(FastSummary)
+    result = chain.invoke(inputs)
+    result.final_summary = result.final_summary.strip()
+    result.youtube_query = result.youtube_query.strip()
+    return result
+
 # ------------------------------
 # Example usage
 # ------------------------------
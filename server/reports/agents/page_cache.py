@@ -0,0 +1,92 @@
+import functools
+import hashlib
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Optional
+from .sqlite_store import SqliteStore
+
+# ------------------------------
+# Per-page extraction cache
+# Key = rendered page image ka sha256 + extractor kind (prompt/model version ke saath).
+# Report dobara issue ho ek extra page ke saath, to sirf naya page Gemini tak jata hai.
+# ------------------------------
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+PAGE_CACHE_TTL_DAYS = int(os.getenv("PAGE_CACHE_TTL_DAYS", "30"))
+PAGE_CACHE_MAX_ENTRIES = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "20000"))
+
+
+class PageCache:
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._counters = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+    def _count(self, kind: str, field: str):
+        # "details:ab12cd" -> "details" (stats me version hash nahi chahiye)
+        with self._lock:
+            self._counters[kind.split(":", 1)[0]][field] += 1
+
+    def get(self, kind: str, page_hash: str) -> Optional[Any]:
+        value = self.store.get(f"{kind}:{page_hash}")
+        self._count(kind, "hits" if value is not None else "misses")
+        return value
+
+    def set(self, kind: str, page_hash: str, value: Any):
+        self.store.set(f"{kind}:{page_hash}", value)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {}
+            for kind, counts in self._counters.items():
+                total = counts["hits"] + counts["misses"]
+                stats[kind] = {**counts, "hit_rate": round(counts["hits"] / total, 3) if total else 0.0}
+            return stats
+
+
+page_cache = PageCache(SqliteStore(
+    "page_extractions",
+    ttl_seconds=PAGE_CACHE_TTL_DAYS * 24 * 3600,
+    max_entries=PAGE_CACHE_MAX_ENTRIES,
+))
+
+
+def cache_kind(name: str, *version_parts: str) -> str:
+    """name + hash of model/prompt, prompt badla to purane pages miss honge."""
+    version = hashlib.sha256("\n".join(version_parts).encode("utf-8")).hexdigest()[:12]
+    return f"{name}:{version}"
+
+
+def cached_page_extraction(kind: str, dump: Callable[[Any], Any], load: Callable[[Any], Any]):
+    """
+    Decorator for fn(page) extractors. Cache hit par Gemini call skip,
+    miss par result store. Empty result (jaise bina tests wala page) bhi store hota hai;
+    sirf failed calls (fn ne page.failed set kiya) store nahi hote, taaki woh retry ho sake.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(page):
+            if not PAGE_CACHE_ENABLED:
+                return fn(page)
+
+            try:
+                cached = page_cache.get(kind, page.content_hash)
+            except Exception as e:
+                print(f"Page cache read failed: {e}")
+                cached = None
+            if cached is not None:
+                return load(cached)
+
+            # page.failed pichle pass se bhi set ho sakta hai, is call ka failure alag dekho
+            failed_before, page.failed = page.failed, False
+            result = fn(page)
+            failed = page.failed
+            page.failed = failed_before or failed
+            if not failed and result is not None:
+                try:
+                    page_cache.set(kind, page.content_hash, dump(result))
+                except Exception as e:
+                    print(f"Page cache write failed: {e}")
+            return result
+        return wrapper
+    return decorator
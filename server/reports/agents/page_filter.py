@@ -0,0 +1,89 @@
+import os
+import re
+from typing import List
+from .page_rendering import RenderedPage
+from .text_layer import group_lines, has_text_layer, has_measurements
+
+# ------------------------------
+# Blank / boilerplate page filter
+# Cover pages, khali pages, disclaimers, signature pages par bhi Gemini calls lagte the.
+# Ye sasta local check un pages ko model calls se pehle hata deta hai. Jo page skip hua
+# uska reason instance JSON (skipped_pages) me jata hai, taaki baad me audit ho sake.
+# ------------------------------
+PAGE_SKIP_ENABLED = os.getenv("REPORT_PAGE_SKIP_ENABLED", "true").lower() in ("1", "true", "yes")
+# Isse kam dark pixels = khali page (normal report page 2-5% hota hai)
+PAGE_BLANK_INK_RATIO = float(os.getenv("REPORT_PAGE_BLANK_INK_RATIO", "0.002"))
+# Text se tabhi skip karo jab page scanned na ho (images se itna kam dhaka ho)
+PAGE_MAX_IMAGE_COVERAGE = float(os.getenv("REPORT_PAGE_MAX_IMAGE_COVERAGE", "0.5"))
+# Page ke kam se kam itne words boilerplate / prose lines me hon tab hi skip (sirf footer match kaafi nahi)
+PAGE_BOILERPLATE_MIN_SHARE = float(os.getenv("REPORT_PAGE_BOILERPLATE_MIN_SHARE", "0.8"))
+# Itne ya zyada words wali line = paragraph text (disclaimer), data row nahi
+PROSE_LINE_WORDS = 8
+
+SKIPPED_METHOD = "skipped"
+BLANK = "blank"
+BOILERPLATE = "boilerplate"
+
+_BOILERPLATE = re.compile(
+    r"disclaimer|terms\s*(?:and|&)\s*conditions|conditions\s+of\s+report|intentionally\s+left\s+blank"
+    r"|authori[sz]ed\s+signatory|electronically\s+(?:signed|verified)|important\s+(?:instructions|notes?)",
+    re.IGNORECASE,
+)
+# Qualitative results (blood group, serology, urine routine) - aise page kabhi skip nahi
+_QUALITATIVE = re.compile(
+    r"\b(?:non[\s-]*reactive|reactive|positive|negative|detected|not\s+detected|absent|present|nil|trace)\b",
+    re.IGNORECASE,
+)
+
+
+def boilerplate_share(lines: List[str]) -> float:
+    """Words ka fraction jo boilerplate lines ya lambe prose paragraphs me hain."""
+    total = boilerplate = 0
+    for line in lines:
+        count = len(line.split())
+        total += count
+        if _BOILERPLATE.search(line) or count >= PROSE_LINE_WORDS:
+            boilerplate += count
+    return boilerplate / total if total else 0.0
+
+
+def skip_reason(page: RenderedPage):
+    """
+    Returns BLANK / BOILERPLATE jab page me koi test content nahi, warna None.
+    Boilerplate = disclaimer/signatory text ho aur page ka zyadatar hissa wahi ho;
+    "Authorised Signatory" footer wale result pages skip nahi hote.
+    Scanned pages (text layer nahi) sirf ink ratio se skip hote hain.
+    """
+    if page.ink_ratio < PAGE_BLANK_INK_RATIO and not has_text_layer(page.words):
+        return BLANK
+
+    if page.image_coverage > PAGE_MAX_IMAGE_COVERAGE or not has_text_layer(page.words):
+        return None
+    lines = group_lines(page.words)
+    if has_measurements(lines) or any(_QUALITATIVE.search(line) for line in lines):
+        return None
+    if any(_BOILERPLATE.search(line) for line in lines) and boilerplate_share(lines) >= PAGE_BOILERPLATE_MIN_SHARE:
+        return BOILERPLATE
+    return None
+
+
+def filter_pages(pages: List[RenderedPage]) -> List[RenderedPage]:
+    """Skip hone wale pages par method/skip_reason set karo, baaki pages return karo."""
+    if not PAGE_SKIP_ENABLED:
+        return list(pages)
+
+    kept = []
+    for page in pages:
+        reason = skip_reason(page)
+        if reason:
+            page.method, page.skip_reason = SKIPPED_METHOD, reason
+        else:
+            kept.append(page)
+    return kept
+
+
+def skipped_pages(pages: List[RenderedPage]) -> List[dict]:
+    return [
+        {"page_number": page.page_number, "reason": page.skip_reason, "ink_ratio": round(page.ink_ratio, 4)}
+        for page in pages if page.method == SKIPPED_METHOD
+    ]
@@ -0,0 +1,74 @@
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# ------------------------------
+# Config (env se override ho sakta hai)
+# ------------------------------
+EXTRACTION_WORKERS = int(os.getenv("REPORT_EXTRACTION_WORKERS", "4"))
+MAX_RETRIES = int(os.getenv("REPORT_EXTRACTION_MAX_RETRIES", "4"))
+BACKOFF_SECONDS = float(os.getenv("REPORT_EXTRACTION_BACKOFF_SECONDS", "1.0"))
+
+RETRYABLE_STATUS_CODES = {429, 500, 503}
+
+# ------------------------------
+# Rate-limit aware retry
+# ------------------------------
+def is_rate_limited(exc: Exception) -> bool:
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    if code in RETRYABLE_STATUS_CODES:
+        return True
+    return "RESOURCE_EXHAUSTED" in str(exc)
+
+def with_backoff(fn: Callable[..., R], *args, **kwargs) -> R:
+    """
+    fn ko call karta hai, 429/503 aane par exponential backoff (with jitter) ke saath retry.
+    Baaki errors turant raise hote hain.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == MAX_RETRIES or not is_rate_limited(e):
+                raise
+            delay = BACKOFF_SECONDS * (2 ** attempt) + random.uniform(0, BACKOFF_SECONDS)
+            print(f"Rate limited ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+# ------------------------------
+# Bounded concurrent map
+# ------------------------------
+def map_pages(
+    fn: Callable[[T], R],
+    pages: Sequence[T],
+    max_workers: int = None,
+    on_result: Optional[Callable[[T, R], None]] = None,
+) -> List[R]:
+    """
+    Run fn on every page using a bounded thread pool.
+    Results come back in the same order as pages, so page_number order is preserved.
+    on_result(page, result) is called as soon as each page finishes (completion order),
+    streaming endpoints isi se partial results bhejte hain.
+    """
+    workers = max_workers or EXTRACTION_WORKERS
+    if workers <= 1 or len(pages) <= 1:
+        results = []
+        for page in pages:
+            result = fn(page)
+            if on_result:
+                on_result(page, result)
+            results.append(result)
+        return results
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(pages))) as executor:
+        futures = {executor.submit(fn, page): page for page in pages}
+        if on_result:
+            for future in as_completed(futures):
+                if future.exception() is None:
+                    on_result(futures[future], future.result())
+        return [future.result() for future in futures]
@@ -0,0 +1,177 @@
+import hashlib
+import io
+import os
+import threading
+from typing import List, Optional, Union
+from PIL import Image, ImageOps
+from pydantic import BaseModel
+import fitz
+
+# Gemini inline request ~20MB tak leta hai; isse badi page image ho to Files API upload
+GEMINI_INLINE_MAX_BYTES = int(os.getenv("GEMINI_INLINE_MAX_BYTES", str(15 * 1024 * 1024)))
+
+# ------------------------------
+# Render profiles
+# dpi / grayscale / crop / encoding. "default" purana behaviour hai (72 dpi RGB JPEG);
+# "adaptive" har page ke text density ke hisaab se profile chunta hai.
+# benchmark_rendering command se bytes, latency aur accuracy compare karke chuno.
+# ------------------------------
+class RenderProfile(BaseModel):
+    name: str
+    dpi: int = 72
+    grayscale: bool = False
+    crop: bool = False             # page ke safed margins kaat do
+    image_format: str = "JPEG"     # JPEG | WEBP
+    quality: int = 75
+
+    @property
+    def mime_type(self) -> str:
+        return f"image/{self.image_format.lower()}"
+
+RENDER_PROFILES = {profile.name: profile for profile in [
+    RenderProfile(name="default"),
+    # Normal print ke digital pages: ~40% kam bytes
+    RenderProfile(name="compact", grayscale=True, crop=True, image_format="WEBP", quality=70),
+    # Chhota print / scanned pages: zyada resolution, bytes lagbhag default jitne
+    RenderProfile(name="sharp", dpi=110, grayscale=True, crop=True, image_format="WEBP", quality=70),
+]}
+ADAPTIVE_PROFILE = "adaptive"
+
+REPORT_RENDER_PROFILE = os.getenv("REPORT_RENDER_PROFILE", "default")
+# Median word height (points) isse kam = small print
+SMALL_PRINT_PT = float(os.getenv("REPORT_SMALL_PRINT_PT", "8"))
+DENSE_PAGE_WORDS = int(os.getenv("REPORT_DENSE_PAGE_WORDS", "400"))
+
+
+def choose_profile(words: Optional[list] = None, profile: Union[str, RenderProfile, None] = None) -> RenderProfile:
+    """profile = naam, RenderProfile, ya None (REPORT_RENDER_PROFILE). "adaptive" page ke words dekhta hai."""
+    profile = profile or REPORT_RENDER_PROFILE
+    if isinstance(profile, RenderProfile):
+        return profile
+    if profile != ADAPTIVE_PROFILE:
+        if profile not in RENDER_PROFILES:
+            raise ValueError(f"Unknown render profile: {profile}")
+        return RENDER_PROFILES[profile]
+
+    # Text layer nahi (scanned page) to font size pata nahi, resolution kam mat karo
+    words = words or []
+    if len(words) < 10:
+        return RENDER_PROFILES["sharp"]
+    heights = sorted(w[3] - w[1] for w in words)
+    if heights[len(heights) // 2] < SMALL_PRINT_PT or len(words) > DENSE_PAGE_WORDS:
+        return RENDER_PROFILES["sharp"]
+    return RENDER_PROFILES["compact"]
+
+# ------------------------------
+# Rendered page (shared by all extractors)
+# ------------------------------
+class RenderedPage:
+    """
+    Ek PDF page jo sirf ek baar rasterize + encode hota hai (render profile ke hisaab se JPEG/WebP).
+    Gemini ko bytes inline jate hain (alag upload call nahi); Part ek baar banta hai aur dono extractors share karte hain.
+    words: PDF ka text layer (fitz "words"), scanned pages / images ke liye khali.
+    method: "text", "vision" ya "skipped", extract_pages set karta hai (skip_reason ke saath).
+    ink_ratio / image_coverage: blank aur scanned pages pehchanne ke liye (page_filter.py).
+    """
+
+    def __init__(self, page_number: int, image_bytes: bytes, words: Optional[list] = None,
+                 ink_ratio: float = 1.0, image_coverage: float = 1.0,
+                 mime_type: str = "image/jpeg", profile: str = "default"):
+        self.page_number = page_number
+        self.image_bytes = image_bytes
+        self.mime_type = mime_type
+        self.profile = profile
+        self.words = words or []
+        self.ink_ratio = ink_ratio
+        self.image_coverage = image_coverage
+        self.method = None
+        self.skip_reason = None
+        self.failed = False   # vision extraction error / unparseable reply (report cache me store nahi hota)
+        self._gemini_part = None
+        self._content_hash = None
+        self._lock = threading.Lock()
+
+    @property
+    def content_hash(self) -> str:
+        """sha256 of the encoded page image (page cache ki key)."""
+        if self._content_hash is None:
+            self._content_hash = hashlib.sha256(self.image_bytes).hexdigest()
+        return self._content_hash
+
+    def to_image(self) -> Image.Image:
+        return Image.open(io.BytesIO(self.image_bytes))
+
+    def gemini_part(self, client):
+        """
+        Page as Gemini content: inline image bytes (no files.upload round trip).
+        Bahut badi image (GEMINI_INLINE_MAX_BYTES se upar) ho to hi Files API upload, ek baar.
+        """
+        from google.genai import types
+
+        with self._lock:
+            if self._gemini_part is None:
+                if len(self.image_bytes) <= GEMINI_INLINE_MAX_BYTES:
+                    self._gemini_part = types.Part.from_bytes(data=self.image_bytes, mime_type=self.mime_type)
+                else:
+                    self._gemini_part = client.files.upload(
+                        file=io.BytesIO(self.image_bytes),
+                        config={"mime_type": self.mime_type}
+                    )
+            return self._gemini_part
+
+# ------------------------------
+# Rendering helpers
+# ------------------------------
+def encode_image(image: Image.Image, profile: Optional[RenderProfile] = None) -> bytes:
+    profile = profile or RENDER_PROFILES["default"]
+    buffer = io.BytesIO()
+    image.convert("L" if profile.grayscale else "RGB").save(buffer, format=profile.image_format, quality=profile.quality)
+    return buffer.getvalue()
+
+def crop_to_content(image: Image.Image, margin: int = 8) -> Image.Image:
+    """Safed margins hatao (khali page jaisa hai waisa rehta hai)."""
+    bbox = ImageOps.invert(image.convert("L")).point(lambda v: 255 if v > 40 else 0).getbbox()
+    if not bbox:
+        return image
+    left, top, right, bottom = bbox
+    return image.crop((max(left - margin, 0), max(top - margin, 0),
+                       min(right + margin, image.width), min(bottom + margin, image.height)))
+
+def ink_ratio(image: Image.Image, threshold: int = 160) -> float:
+    """Dark pixels ka fraction (grayscale). Khali page ~0, normal report page 2-5%."""
+    histogram = image.convert("L").histogram()
+    return sum(histogram[:threshold]) / max(sum(histogram), 1)
+
+def image_coverage(page: fitz.Page) -> float:
+    """Page area ka kitna hissa embedded images se dhaka hai (scanned page ~0.9, digital page me sirf logo/signature)."""
+    page_area = abs(page.rect) or 1.0
+    covered = sum(abs(fitz.Rect(info["bbox"]) & page.rect) for info in page.get_image_info())
+    return min(covered / page_area, 1.0)
+
+def render_image(image: Image.Image, page_number: int = 1, words: Optional[list] = None,
+                 coverage: float = 1.0, profile: Union[str, RenderProfile, None] = None) -> RenderedPage:
+    profile = choose_profile(words, profile)
+    encoded = encode_image(crop_to_content(image) if profile.crop else image, profile)
+    return RenderedPage(
+        page_number=page_number, image_bytes=encoded, words=words,
+        ink_ratio=ink_ratio(image), image_coverage=coverage,
+        mime_type=profile.mime_type, profile=profile.name,
+    )
+
+def open_pdf(pdf: Union[str, bytes]) -> fitz.Document:
+    """pdf = file path, ya upload ke bytes (memory me hi khulta hai, disk par kuch nahi likha jata)."""
+    if isinstance(pdf, (bytes, bytearray)):
+        return fitz.open(stream=pdf, filetype="pdf")
+    return fitz.open(pdf)
+
+def render_pdf_pages(pdf: Union[str, bytes], profile: Union[str, RenderProfile, None] = None) -> List[RenderedPage]:
+    pages = []
+    with open_pdf(pdf) as doc:
+        for i, page in enumerate(doc, start=1):
+            # Text layer bhi yahin nikal lo (digital PDFs ke pages vision ke bina parse hote hain)
+            words = page.get_text("words")
+            page_profile = choose_profile(words, profile)
+            pix = page.get_pixmap(dpi=page_profile.dpi, colorspace=fitz.csGRAY if page_profile.grayscale else fitz.csRGB)
+            img = Image.frombytes("L" if page_profile.grayscale else "RGB", [pix.width, pix.height], pix.samples)
+            pages.append(render_image(img, page_number=i, words=words, coverage=image_coverage(page), profile=page_profile))
+    return pages
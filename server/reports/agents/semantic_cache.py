@@ -0,0 +1,115 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from typing import List, Optional, Tuple
+from .embeddings import get_embedder
+from .vector_index import VectorTable, serialize
+
+# ------------------------------
+# Semantic response cache (chatbot)
+# Key = normalized question ka embedding + prompt context ka hash (health profile + report excerpts,
+# chat.cache_context). "what should I eat for high sugar" aur "What to eat for high sugar?" ek hi
+# answer share karte hain, lekin sirf same context ke andar.
+# ------------------------------
+CHAT_SEMANTIC_CACHE_ENABLED = os.getenv("CHAT_SEMANTIC_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+CHAT_SEMANTIC_CACHE_THRESHOLD = float(os.getenv("CHAT_SEMANTIC_CACHE_THRESHOLD", "0.92"))
+CHAT_SEMANTIC_CACHE_TTL_SECONDS = int(os.getenv("CHAT_SEMANTIC_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+CHAT_SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("CHAT_SEMANTIC_CACHE_MAX_ENTRIES", "10000"))
+
+
+def normalize_question(question: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", question.lower()))
+
+
+def context_hash(context: str) -> str:
+    return hashlib.sha256((context or "").strip().encode("utf-8")).hexdigest()
+
+
+class SemanticCache(VectorTable):
+    """Cached answers with TTL, least-recently-used eviction and in-process hit/miss counters."""
+
+    schema = (
+        "CREATE TABLE IF NOT EXISTS {table} ("
+        "id INTEGER PRIMARY KEY, context_hash TEXT NOT NULL, question TEXT NOT NULL, "
+        "embedding BLOB NOT NULL, response TEXT NOT NULL, hits INTEGER NOT NULL DEFAULT 0, "
+        "created_at REAL NOT NULL, last_used_at REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS {table}_context ON {table} (context_hash)",
+        "CREATE INDEX IF NOT EXISTS {table}_last_used ON {table} (last_used_at)",
+    )
+
+    def __init__(self, embedder=None, path: str = None, threshold: float = None,
+                 ttl_seconds: Optional[int] = None, max_entries: Optional[int] = None):
+        self.embedder = embedder or get_embedder()
+        # v2: key me ab poora prompt context hai; v1 ke jawab history ke saath bane the, reuse nahi karne
+        super().__init__(f"chat_semantic_cache_v2_{self.embedder.name}", path)
+        self.threshold = threshold if threshold is not None else CHAT_SEMANTIC_CACHE_THRESHOLD
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else CHAT_SEMANTIC_CACHE_TTL_SECONDS
+        self.max_entries = max_entries if max_entries is not None else CHAT_SEMANTIC_CACHE_MAX_ENTRIES
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0}
+
+    def _count(self, field: str):
+        with self._lock:
+            self._counters[field] += 1
+
+    def lookup(self, question: str, context: str) -> Tuple[Optional[str], List[float]]:
+        """
+        Returns (cached response ya None, question embedding).
+        Miss par embedding store() ko wapas do, dobara embed nahi karna padega.
+        """
+        vector = self.embedder.embed_query(normalize_question(question))
+        matches = self._nearest(
+            "id, response", "context_hash = ? AND created_at >= ?",
+            (context_hash(context), time.time() - self.ttl_seconds), vector, 1,
+        )
+        if not matches or matches[0][2] < self.threshold:
+            self._count("misses")
+            return None, vector
+
+        entry_id, response, _ = matches[0]
+        conn = self._connect()
+        conn.execute(f"UPDATE {self.table} SET hits = hits + 1, last_used_at = ? WHERE id = ?", (time.time(), entry_id))
+        conn.commit()
+        self._count("hits")
+        return response, vector
+
+    def store(self, question: str, context: str, response: str, vector: List[float] = None):
+        vector = vector or self.embedder.embed_query(normalize_question(question))
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            f"INSERT INTO {self.table} (context_hash, question, embedding, response, created_at, last_used_at) "
+            f"VALUES (?, ?, ?, ?, ?, ?)",
+            (context_hash(context), normalize_question(question), serialize(vector), response, now, now),
+        )
+        conn.commit()
+        self._written()
+
+    def evict(self):
+        self._evict_rows("id", self.ttl_seconds, self.max_entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counters)
+        total = counts["hits"] + counts["misses"]
+        entries, stored_hits = self._connect().execute(f"SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM {self.table}").fetchone()
+        return {
+            **counts,
+            "hit_rate": round(counts["hits"] / total, 3) if total else 0.0,
+            "entries": entries,
+            "total_hits": stored_hits,   # sab workers ke, table se
+        }
+
+
+_cache: Optional[SemanticCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> SemanticCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None or _cache.embedder is not get_embedder():
+            _cache = SemanticCache()
+        return _cache
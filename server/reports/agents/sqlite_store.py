@@ -0,0 +1,138 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+# ------------------------------
+# Local persistent key/value store for agent caches
+# Django ke bina bhi chalta hai (agents standalone run hote hain),
+# aur ek hi file gunicorn ke saare workers share karte hain.
+# ------------------------------
+AGENT_CACHE_PATH = os.getenv(
+    "AGENT_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "agent_cache.sqlite3"),
+)
+
+
+class SqliteTable:
+    """
+    Base for one table in the agent cache file: per-thread connection (WAL), schema
+    create on first use, aur TTL / least-recently-used eviction helpers.
+    Subclasses set `schema` (statements with {table}) and override evict().
+    """
+
+    schema = ()
+
+    def __init__(self, table: str, path: str = None):
+        self.table = table
+        self.path = path or AGENT_CACHE_PATH
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite connection thread ke beech share nahi hota, isliye per-thread connection
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in self.schema:
+                conn.execute(statement.format(table=self.table))
+            conn.commit()
+            self._local.conn = conn
+            self._on_connect(conn)
+        return conn
+
+    def _on_connect(self, conn: sqlite3.Connection):
+        pass
+
+    def _written(self):
+        # Har write par evict karna mehenga hai, thodi thodi der me karo
+        self._writes += 1
+        if self._writes % 50 == 1:
+            self.evict()
+
+    def _evict_rows(self, key_column: str, ttl_seconds: Optional[int], max_entries: Optional[int]):
+        conn = self._connect()
+        if ttl_seconds is not None:
+            conn.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (time.time() - ttl_seconds,))
+        if max_entries is not None:
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE {key_column} IN ("
+                f"SELECT {key_column} FROM {self.table} ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+                (max_entries,),
+            )
+        conn.commit()
+
+    def evict(self):
+        pass
+
+    def clear(self):
+        conn = self._connect()
+        conn.execute(f"DELETE FROM {self.table}")
+        conn.commit()
+
+
+class SqliteStore(SqliteTable):
+    """
+    JSON values in a single sqlite table with TTL expiry and
+    least-recently-used eviction above max_entries.
+    """
+
+    schema = (
+        "CREATE TABLE IF NOT EXISTS {table} ("
+        "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+        "created_at REAL NOT NULL, last_used_at REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS {table}_last_used ON {table} (last_used_at)",
+    )
+
+    def __init__(self, table: str, ttl_seconds: Optional[int] = None, max_entries: Optional[int] = None, path: str = None):
+        super().__init__(table, path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+    def get(self, key: str) -> Optional[Any]:
+        conn = self._connect()
+        row = conn.execute(f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+
+        now = time.time()
+        if self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            conn.commit()
+            return None
+
+        conn.execute(f"UPDATE {self.table} SET last_used_at = ? WHERE key = ?", (now, key))
+        conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any):
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, last_used_at) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value), now, now),
+        )
+        conn.commit()
+        self._written()
+
+    def evict(self):
+        self._evict_rows("key", self.ttl_seconds, self.max_entries)
+
+
+class MemoryStore:
+    """Same get/set interface as SqliteStore, process memory me (tests / offline runs ke liye)."""
+
+    def __init__(self, data: dict = None):
+        self.data = dict(data or {})
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.data.get(key)
+
+    def set(self, key: str, value: Any):
+        self.data[key] = value
+
+    def clear(self):
+        self.data.clear()
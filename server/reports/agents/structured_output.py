@@ -0,0 +1,98 @@
+import json
+import os
+import re
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Optional
+from pydantic import TypeAdapter, ValidationError
+from .page_pool import with_backoff
+
+# ------------------------------
+# Schema-constrained Gemini output
+# Pydantic schema response_schema ke roop me jata hai, to Gemini seedha valid JSON deta hai
+# (markdown fences / extra text nahi). Phir bhi parse fail ho to ek hi repair call:
+# purana output + error bhej kar JSON theek karwao (image dobara nahi jati).
+# Har kind ke ok / repaired / failed counters metrics endpoint par dikhte hain.
+# ------------------------------
+STRUCTURED_OUTPUT_ENABLED = os.getenv("GEMINI_STRUCTURED_OUTPUT", "true").lower() in ("1", "true", "yes")
+
+repair_prompt = """
+Your previous reply could not be parsed as JSON matching the required schema.
+
+Error: {error}
+
+Previous reply:
+{reply}
+
+Return the same information as valid JSON matching the schema. Respond with JSON only.
+"""
+
+
+class ParseStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(lambda: {"ok": 0, "repaired": 0, "failed": 0})
+
+    def count(self, kind: str, field: str):
+        with self._lock:
+            self._counters[kind][field] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {}
+            for kind, counts in self._counters.items():
+                total = sum(counts.values())
+                stats[kind] = {**counts, "failure_rate": round(counts["failed"] / total, 3) if total else 0.0}
+            return stats
+
+
+parse_stats = ParseStats()
+
+
+def load_json(text: str) -> Any:
+    """Structured mode me text already JSON hai; purane (free text) mode ke liye fences/extra text hatao."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        clean_text = re.sub(r"```(?:json)?", "", text).strip("` \n")
+        match = re.search(r"(\{.*\}|\[.*\])", clean_text, re.DOTALL)
+        if not match:
+            raise
+        return json.loads(match.group(1))
+
+
+def generate_json(
+    client, model: str, contents: list, schema, kind: str,
+    parse: Optional[Callable[[Any], Any]] = None, config: Optional[dict] = None,
+):
+    """
+    generate_content + parse, at most one repair call.
+    schema: Pydantic model ya list[Model]; parse(data) default me schema se validate karta hai.
+    Returns parsed result, ya None (dono attempts fail). API errors caller tak jate hain.
+    """
+    parse = parse or TypeAdapter(schema).validate_python
+    config = dict(config or {})
+    if STRUCTURED_OUTPUT_ENABLED:
+        config.update(response_mime_type="application/json", response_schema=schema)
+
+    reply, error = "", None
+    for attempt in range(2):
+        if attempt == 0 or not reply:
+            # Khali / blocked reply ki repair nahi ho sakti, original request hi dobara
+            request = contents
+        else:
+            request = [repair_prompt.format(error=error, reply=reply)]
+
+        response = with_backoff(client.models.generate_content, model=model, contents=request, config=config or None)
+        reply = getattr(response, "text", None) or ""
+        try:
+            result = parse(load_json(reply))
+            parse_stats.count(kind, "repaired" if attempt else "ok")
+            return result
+        except (ValueError, TypeError, ValidationError) as e:
+            # json.JSONDecodeError bhi ValueError hai
+            error = e
+            print(f"Could not parse {kind} response (attempt {attempt + 1}): {e}")
+
+    parse_stats.count(kind, "failed")
+    return None
@@ -0,0 +1,151 @@
+import os
+import re
+from typing import List, Optional, Sequence, Tuple
+from .extracting_basic_details import ReportDetails
+from .extracting_json_details import TestResult
+
+# ------------------------------
+# Text-layer-first extraction
+# Digital (born-digital) PDFs me asli text hota hai: test rows yahin PyMuPDF words se
+# parse ho jate hain, test extraction ke liye Gemini call ki zaroorat nahi. Scanned / image-only pages, ya jin
+# pages par koi row parse nahi hui, vision path par jate hain.
+# ------------------------------
+TEXT_LAYER_ENABLED = os.getenv("REPORT_TEXT_LAYER_ENABLED", "true").lower() in ("1", "true", "yes")
+TEXT_LAYER_MIN_CHARS = int(os.getenv("REPORT_TEXT_LAYER_MIN_CHARS", "50"))
+TEXT_LAYER_MIN_ROWS = int(os.getenv("REPORT_TEXT_LAYER_MIN_ROWS", "1"))
+# Text se disease_name / questions nahi nikalte; on ho to text pages ki details ek details-only
+# vision call se aati hain (tests phir bhi text se), taaki digital PDFs me ye fields gayab na hon
+TEXT_LAYER_VISION_DETAILS = os.getenv("REPORT_TEXT_LAYER_VISION_DETAILS", "true").lower() in ("1", "true", "yes")
+
+# Parser (regexes/heuristics) badle to ise badlo, report cache purani entries miss karega
+TEXT_LAYER_VERSION = "2"
+
+TEXT_METHOD = "text"
+VISION_METHOD = "vision"
+
+# (x0, y0, x1, y1, word, block_no, line_no, word_no) - fitz page.get_text("words")
+Word = Tuple[float, float, float, float, str, int, int, int]
+
+_NUM = r"\d{1,3}(?:,\d{2,3})+(?:\.\d+)?|\d+(?:\.\d+)?"
+_RANGE = (
+    rf"(?:{_NUM})\s*(?:-|–|to)\s*(?:{_NUM})"
+    rf"|(?:<=|>=|<|>|≤|≥|up\s*to|upto|less\s+than|more\s+than)\s*(?:{_NUM})"
+)
+_UNIT = r"%|[^\s\d][^\s]*|\d+[\^x*]\S*"
+_ROW = re.compile(
+    rf"^(?P<name>[A-Za-z][A-Za-z0-9 ()%#/.,'+\-]*?[A-Za-z0-9)%#])\s*:?\s+"
+    # "CA 19-9 20 U/mL": 19 value nahi, naam ka hissa hai
+    rf"(?P<value>{_NUM})(?![.,]?\d)(?![-–]\s*\d)\s*(?:\b(?:H|L|High|Low)\b|\*)?\s*"
+    rf"(?P<unit>{_UNIT})?\s*(?P<range>{_RANGE})?(?:\s+.*)?$",
+    re.IGNORECASE,
+)
+# Range na ho to value ke saath pehchana hua unit chahiye, warna "Age 45 Years" jaise rows aa jate
+_KNOWN_UNIT = re.compile(r"^(?:%|.*/.*|fl|pg|ratio|sec|seconds|mill?ions?|lakhs?)$", re.IGNORECASE)
+# Patient header fields (AGE/SEX : 55 YEAR/MALE) tests nahi hain
+_HEADER_NAME = re.compile(r"\b(?:age|sex|patient|date|time|id|page|ref|reg|sample|collected|report(?:ed)?)\b", re.IGNORECASE)
+
+# "Dr. Nandan M. Valavaikar" haan, lekin "Dr. Amrin Shaikh REG. DATE" me se sirf naam
+_DOCTOR = re.compile(r"\bDr\.?\s+[A-Z][a-z.]*(?=\s|$)(?:\s+[A-Z][a-z.]*(?=\s|$)){0,3}")
+_FACILITY = re.compile(r"\b(?:hospitals?|clinic|diagnostics?|laboratories|labs?|centre|center|healthcare|nursing\s+home|limited|ltd|pvt)\b", re.IGNORECASE)
+# Koi bhi value jaisi cheez: range, ya number ke baad unit (mg/dL, %, /cumm)
+_MEASUREMENT = re.compile(rf"{_RANGE}|(?:{_NUM})\s*(?:%|\S*/\S+)", re.IGNORECASE)
+# Result row jaisi line: naam, phir value (comparator ke baad nahi, range ka start nahi) aur
+# uske baad unit ya range. Interpretation tables ("At risk 5.7-6.4", "Goal < 7") isme nahi aate.
+_RESULT_LIKE = re.compile(
+    rf"[A-Za-z].*?(?<![<>=≤≥:])(?<![<>=≤≥:]\s)(?<![\d.,])(?:{_NUM})(?![-–]\s*\d)(?![\d.,])"
+    rf"\s*(?:[HL*]\s+)?(?:%|\S*/\S+|{_RANGE})",
+    re.IGNORECASE,
+)
+_END = re.compile(r"end\s*of\s*(?:the\s*)?report", re.IGNORECASE)
+
+
+def group_lines(words: Sequence[Word]) -> List[str]:
+    """
+    Words ko visual lines me jodo (y-center ke hisaab se). Tables me har cell alag block
+    hota hai, isliye fitz ke block/line numbers par bharosa nahi kiya.
+    """
+    lines = []
+    for word in sorted(words, key=lambda w: ((w[1] + w[3]) / 2, w[0])):
+        center = (word[1] + word[3]) / 2
+        tolerance = max((word[3] - word[1]) * 0.5, 1.0)
+        if lines and abs(center - lines[-1][0]) <= tolerance:
+            lines[-1][1].append(word)
+        else:
+            lines.append((center, [word]))
+    return [" ".join(w[4] for w in sorted(line, key=lambda w: w[0])) for _, line in lines]
+
+
+def _to_float(value: str) -> float:
+    return float(value.replace(",", ""))
+
+
+def parse_test_row(line: str) -> Optional[TestResult]:
+    match = _ROW.match(line.strip())
+    if not match or _HEADER_NAME.search(match.group("name")):
+        return None
+
+    test_range = match.group("range")
+    unit = match.group("unit")
+    if not test_range and not (unit and _KNOWN_UNIT.match(unit)):
+        return None
+    return TestResult(Name=match.group("name").strip(" -:"), Found=_to_float(match.group("value")), Range=test_range)
+
+
+def parse_tests(lines: List[str]) -> List[TestResult]:
+    return [test for test in (parse_test_row(line) for line in lines) if test]
+
+
+def unparsed_result_lines(lines: List[str]) -> List[str]:
+    """Result jaisi lines jo parse_test_row nahi samajh paya (inke hote text result pe bharosa nahi)."""
+    return [
+        line for line in lines
+        if _RESULT_LIKE.search(line) and not _HEADER_NAME.search(line) and parse_test_row(line) is None
+    ]
+
+
+def has_measurements(lines: List[str]) -> bool:
+    """Rows parse na hon tab bhi: kya page par koi test value jaisi line hai? (page_filter ke liye)"""
+    return any(_MEASUREMENT.search(line) and not _HEADER_NAME.search(line) for line in lines)
+
+
+def parse_details(lines: List[str]) -> ReportDetails:
+    """
+    Header/footer se jo mil jaye: doctor, lab/hospital + uske neeche wali address line, end marker.
+    disease_name / questions text se nahi nikalte, None rehte hain; TEXT_LAYER_VISION_DETAILS on ho to
+    caller ye details vision se leta hai aur ye sirf fallback hai.
+    """
+    doctor = next((m.group(0).strip() for m in map(_DOCTOR.search, lines) if m), None)
+
+    hospital_address = None
+    for i, line in enumerate(lines):
+        # Lab/hospital ka naam chhoti line hoti hai (disclaimer paragraphs me bhi "laboratory" aata hai)
+        if len(line) <= 60 and _FACILITY.search(line) and not _ROW.match(line):
+            hospital_address = ", ".join(part.strip() for part in lines[i:i + 2])
+            break
+
+    return ReportDetails(
+        doctor_name=doctor,
+        hospital_address=hospital_address,
+        # "- - E n d  o f  R e p o r t - -" jaise spaced markers bhi
+        end=any(_END.search(line.replace(" ", "")) for line in lines),
+    )
+
+
+def has_text_layer(words: Sequence[Word]) -> bool:
+    return sum(len(w[4]) for w in words) >= TEXT_LAYER_MIN_CHARS
+
+
+def extract_from_text_layer(words: Sequence[Word]) -> Optional[Tuple[ReportDetails, List[TestResult]]]:
+    """
+    Returns (details, tests) jab page text layer se hi poora parse ho gaya,
+    warna None (caller vision path use kare). Ek bhi result jaisi line parse na ho
+    to poora page vision ko jata hai, taaki koi test chupchaap drop na ho.
+    """
+    if not TEXT_LAYER_ENABLED or not words or not has_text_layer(words):
+        return None
+
+    lines = group_lines(words)
+    tests = parse_tests(lines)
+    if len(tests) < TEXT_LAYER_MIN_ROWS or unparsed_result_lines(lines):
+        return None
+    return parse_details(lines), tests
@@ -0,0 +1,67 @@
+import json
+import threading
+from typing import Any, Callable, List, TypeVar
+import tiktoken
+
+T = TypeVar("T")
+
+# ------------------------------
+# Token counting (tiktoken), chunking ke liye
+# ------------------------------
+_encodings = {}
+_lock = threading.Lock()
+
+
+def _get_encoding(model_name: str):
+    with _lock:
+        if model_name not in _encodings:
+            try:
+                try:
+                    _encodings[model_name] = tiktoken.encoding_for_model(model_name)
+                except KeyError:
+                    _encodings[model_name] = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                # BPE file download nahi ho paya (offline) - approx count use karenge
+                print(f"tiktoken unavailable: {e}")
+                _encodings[model_name] = None
+        return _encodings[model_name]
+
+
+def count_tokens(text: str, model_name: str = "gpt-4o-mini") -> int:
+    encoding = _get_encoding(model_name)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+
+def count_json_tokens(data: Any, model_name: str = "gpt-4o-mini") -> int:
+    return count_tokens(json.dumps(data, indent=2), model_name)
+
+
+def chunk_by_tokens(items: List[T], budget: int, measure: Callable[[T], int]) -> List[List[T]]:
+    """
+    Greedy packing: items order me rehte hain, har chunk budget ke andar.
+    Akela item budget se bada ho to apne chunk me jata hai.
+    """
+    chunks, current, used = [], [], 0
+    for item in items:
+        size = measure(item)
+        if current and used + size > budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += size
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def truncate_tokens(text: str, budget: int, model_name: str = "gpt-4o-mini") -> str:
+    """Text ko budget tokens tak kaato (LLM ne limit ignore ki ho to bhi record bounded rahe)."""
+    encoding = _get_encoding(model_name)
+    if encoding is None:
+        return text[: budget * 4]
+    tokens = encoding.encode(text)
+    if len(tokens) <= budget:
+        return text
+    return encoding.decode(tokens[:budget])
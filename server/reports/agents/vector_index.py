@@ -0,0 +1,112 @@
+import heapq
+import sqlite3
+import struct
+import threading
+from typing import List, Optional, Sequence, Tuple
+from .sqlite_store import SqliteTable
+from .embeddings import get_embedder
+
+# ------------------------------
+# Local vector index for report chunks (sqlite + sqlite-vec)
+# Ek hi plain table: sqlite-vec extension load ho jaye to distance SQL ke andar
+# (vec_distance_cosine) nikalta hai, warna Python me. Search hamesha ek user ke
+# chunks par hota hai, to brute force bhi kuch sau rows hi dekhta hai.
+# ------------------------------
+
+
+def serialize(vector: Sequence[float]) -> bytes:
+    # sqlite-vec ka float32 blob format (sqlite_vec.serialize_float32 jaisa)
+    return struct.pack(f"{len(vector)}f", *vector)
+
+
+def deserialize(blob: bytes) -> Tuple[float, ...]:
+    return struct.unpack(f"{len(blob) // 4}f", blob)
+
+
+def load_sqlite_vec(conn: sqlite3.Connection) -> bool:
+    try:
+        import sqlite_vec
+        conn.enable_load_extension(True)
+        sqlite_vec.load(conn)
+        conn.enable_load_extension(False)
+        return True
+    except Exception:
+        # Kuch Python builds me extension loading band hoti hai
+        return False
+
+
+class VectorTable(SqliteTable):
+    """SqliteTable with an `embedding` float32 blob column and cosine nearest-neighbour search."""
+
+    def _on_connect(self, conn: sqlite3.Connection):
+        self._local.has_vec = load_sqlite_vec(conn)
+
+    def _nearest(self, columns: str, where: str, params: tuple, vector: Sequence[float], k: int) -> List[tuple]:
+        """Top-k rows matching `where`: [(*columns, similarity)], best first."""
+        conn = self._connect()
+        if self._local.has_vec:
+            rows = conn.execute(
+                f"SELECT {columns}, vec_distance_cosine(embedding, ?) AS distance "
+                f"FROM {self.table} WHERE {where} ORDER BY distance LIMIT ?",
+                (serialize(vector), *params, k),
+            )
+            return [(*row[:-1], 1.0 - row[-1]) for row in rows]
+
+        # Vectors normalized hain, to cosine similarity = dot product
+        rows = conn.execute(f"SELECT {columns}, embedding FROM {self.table} WHERE {where}", params)
+        scored = ((*row[:-1], sum(a * b for a, b in zip(vector, deserialize(row[-1])))) for row in rows)
+        return heapq.nlargest(k, scored, key=lambda row: row[-1])
+
+
+class VectorIndex(VectorTable):
+    """Per-embedder table of (user_id, instance_id, text, embedding) chunks."""
+
+    schema = (
+        "CREATE TABLE IF NOT EXISTS {table} ("
+        "id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, instance_id INTEGER NOT NULL, "
+        "text TEXT NOT NULL, embedding BLOB NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS {table}_user ON {table} (user_id)",
+        "CREATE INDEX IF NOT EXISTS {table}_instance ON {table} (instance_id)",
+    )
+
+    def __init__(self, embedder=None, path: str = None):
+        self.embedder = embedder or get_embedder()
+        super().__init__(f"report_chunks_{self.embedder.name}", path)
+
+    def add(self, user_id: int, instance_id: int, texts: List[str]):
+        """Instance ke chunks (re)index karo. Dobara call karne par purane chunks replace hote hain."""
+        vectors = self.embedder.embed_documents(texts) if texts else []
+        conn = self._connect()
+        with conn:
+            conn.execute(f"DELETE FROM {self.table} WHERE instance_id = ?", (instance_id,))
+            conn.executemany(
+                f"INSERT INTO {self.table} (user_id, instance_id, text, embedding) VALUES (?, ?, ?, ?)",
+                [(user_id, instance_id, text, serialize(vector)) for text, vector in zip(texts, vectors)],
+            )
+
+    def delete_instances(self, instance_ids: Sequence[int]):
+        conn = self._connect()
+        with conn:
+            conn.executemany(f"DELETE FROM {self.table} WHERE instance_id = ?", [(i,) for i in instance_ids])
+
+    def indexed_instances(self, user_id: int) -> set:
+        conn = self._connect()
+        rows = conn.execute(f"SELECT DISTINCT instance_id FROM {self.table} WHERE user_id = ?", (user_id,))
+        return {row[0] for row in rows}
+
+    def search(self, user_id: int, query: str, k: int = 5) -> List[Tuple[str, int, float]]:
+        """Top-k chunks for one user. Returns [(text, instance_id, similarity)], best first."""
+        vector = self.embedder.embed_query(query)
+        return self._nearest("text, instance_id", "user_id = ?", (user_id,), vector, k)
+
+
+_index: Optional[VectorIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> VectorIndex:
+    global _index
+    with _index_lock:
+        if _index is None or _index.embedder is not get_embedder():
+            _index = VectorIndex()
+        return _index
@@ -1,12 +1,9 @@
+import threading
 from langgraph.graph import StateGraph, START, END
-from langchain_openai import ChatOpenAI
 from typing import TypedDict
-from dotenv import load_dotenv  
-import os
+from .clients import get_chat_model
 
-load_dotenv() 
-
-model = ChatOpenAI(model_name="gpt-4")  # You can choose a better model if needed
+YOUTUBE_QUERY_MODEL = "gpt-4"  # You can choose a better model if needed
 
 class LlmState(TypedDict):
     report_summary: str
@@ -24,21 +21,31 @@ def generate_youtube_query(state: LlmState) -> LlmState:
     Only give the query, no extra explanation.
     """
     
-    result = model.invoke(prompt).content.strip()
+    result = get_chat_model(YOUTUBE_QUERY_MODEL).invoke(prompt).content.strip()
     state['youtube_query'] = result
     return state
 
-# Setup workflow graph
-graph = StateGraph(LlmState)
-graph.add_node("generate_youtube_query", generate_youtube_query)
-graph.add_edge(START, "generate_youtube_query")
-graph.add_edge("generate_youtube_query", END)
-workflow = graph.compile()
+# Setup workflow graph (pehli call par compile hota hai, import par nahi)
+_workflow = None
+_workflow_lock = threading.Lock()
+
+
+def get_workflow():
+    global _workflow
+    if _workflow is None:
+        with _workflow_lock:
+            if _workflow is None:
+                graph = StateGraph(LlmState)
+                graph.add_node("generate_youtube_query", generate_youtube_query)
+                graph.add_edge(START, "generate_youtube_query")
+                graph.add_edge("generate_youtube_query", END)
+                _workflow = graph.compile()
+    return _workflow
 
 
 def get_youtube_query(report_summary: str) -> str:
     initial_state = {'report_summary': report_summary}
-    result = workflow.invoke(initial_state)
+    result = get_workflow().invoke(initial_state)
     return result['youtube_query']
 
 if __name__ == "__main__":
@@ -56,5 +63,5 @@ if __name__ == "__main__":
     initial_state = {
         'report_summary':summary}
 
-    result = workflow.invoke(initial_state)
+    result = get_workflow().invoke(initial_state)
     print("YouTube Search Query:", result['youtube_query'])
@@ -1,24 +1,84 @@
 import json
-from googleapiclient.discovery import build
 import os
+import re
+import threading
+from typing import Dict, List
+from googleapiclient.discovery import build
 from dotenv import load_dotenv
+from .sqlite_store import SqliteStore
 
 load_dotenv()
 
-def youtube_search(query, max_results=5):
-    api_key = os.getenv("GOOGLE_API_KEY_YOUTUBE")  # Load API key from .env
-    print("Using Google API Key:", api_key)
-    youtube = build("youtube", "v3", developerKey=api_key)
+# ------------------------------
+# Reusable client + persistent result cache
+# ------------------------------
+YOUTUBE_CACHE_TTL_SECONDS = int(os.getenv("YOUTUBE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+YOUTUBE_CACHE_MAX_ENTRIES = int(os.getenv("YOUTUBE_CACHE_MAX_ENTRIES", "5000"))
+
+# httplib2 thread-safe nahi hai, isliye har thread ka apna client (ek baar build hota hai)
+_local = threading.local()
+
+# Koi bhi object jisme get(key) / set(key, value) ho; tests offline chalane ke liye MemoryStore inject karo
+_cache = SqliteStore("youtube_results", ttl_seconds=YOUTUBE_CACHE_TTL_SECONDS, max_entries=YOUTUBE_CACHE_MAX_ENTRIES)
+
+
+def get_client():
+    client = getattr(_local, "client", None)
+    if client is None:
+        api_key = os.getenv("GOOGLE_API_KEY_YOUTUBE")  # Load API key from .env
+        client = build("youtube", "v3", developerKey=api_key, cache_discovery=False)
+        _local.client = client
+    return client
+
+
+def set_client(client):
+    """Current thread ke liye client replace karo (tests me fake client ke liye)."""
+    _local.client = client
+
+
+def set_cache(cache):
+    global _cache
+    _cache = cache
+
+
+def normalize_query(query: str) -> str:
+    """
+    "Yoga for Anemia!" aur "anemia yoga for" ek hi key banaye,
+    taaki similar conditions wale users ek hi lookup share karein.
+    """
+    words = re.findall(r"[a-z0-9]+", query.lower())
+    return " ".join(sorted(set(words)))
+
+
+def _cache_key(query: str, max_results: int) -> str:
+    return f"{normalize_query(query)}|{max_results}"
+
 
+def _cache_get(cache, key):
+    try:
+        return cache.get(key)
+    except Exception as e:
+        print(f"YouTube cache read failed: {e}")
+        return None
 
-    #
-    request = youtube.search().list(
+
+def _cache_set(cache, key, value):
+    try:
+        cache.set(key, value)
+    except Exception as e:
+        print(f"YouTube cache write failed: {e}")
+
+
+def _search_request(client, query: str, max_results: int):
+    return client.search().list(
         part="snippet",
         q=query,
         type="video",
         maxResults=max_results
     )
-    response = request.execute()
+
+
+def _parse_items(response) -> List[dict]:
     results = []
     for item in response['items']:
         video_data = {
@@ -33,9 +93,57 @@ def youtube_search(query, max_results=5):
             "embed_url": f"https://www.youtube.com/embed/{item['id']['videoId']}"
         }
         results.append(video_data)
+    return results
+
+
+def youtube_search(query, max_results=5, cache=None):
+    cache = cache or _cache
+    key = _cache_key(query, max_results)
+
+    results = _cache_get(cache, key)
+    if results is None:
+        response = _search_request(get_client(), query, max_results).execute()
+        results = _parse_items(response)
+        _cache_set(cache, key, results)
 
     return json.dumps(results, indent=4)  # Convert to JSON format with indentation
 
+
+def youtube_search_many(queries: List[str], max_results=5, cache=None) -> Dict[str, List[dict]]:
+    """
+    Kai queries ek saath: cache hits turant, baaki sab ek hi batch HTTP request me.
+    Returns {query: [video, ...]}; jo query fail hui uska result [] hota hai.
+    """
+    cache = cache or _cache
+    results = {}
+    misses = []
+    for query in dict.fromkeys(queries):
+        cached = _cache_get(cache, _cache_key(query, max_results))
+        if cached is None:
+            misses.append(query)
+        else:
+            results[query] = cached
+
+    if misses:
+        client = get_client()
+        batch = client.new_batch_http_request()
+
+        def callback(request_id, response, exception):
+            query = misses[int(request_id)]
+            if exception is not None:
+                print(f"YouTube search failed for {query!r}: {exception}")
+                results[query] = []
+                return
+            results[query] = _parse_items(response)
+            _cache_set(cache, _cache_key(query, max_results), results[query])
+
+        for i, query in enumerate(misses):
+            batch.add(_search_request(client, query, max_results), callback=callback, request_id=str(i))
+        batch.execute()
+
+    return {query: results.get(query, []) for query in queries}
+
+
 if __name__ == "__main__":
     search_results_json = youtube_search("Yoga and exercises to improve blood health and hematology", max_results=10)
-    print(search_results_json)  # Print in JSON format
\ No newline at end of file
+    print(search_results_json)  # Print in JSON format
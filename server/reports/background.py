@@ -0,0 +1,53 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.db import close_old_connections
+
+# ------------------------------
+# Background worker pools (in-process, koi external broker nahi)
+# Report jobs (minutes lagte hain) apne pool par, aur chhote kaam (YouTube fill, health profile,
+# RAG indexing, chat compaction) alag pool par - taaki do lambe jobs baaki sab ko na rok dein,
+# aur indexing ke dher saare tasks report jobs ke aage na lag jayein.
+# ------------------------------
+REPORT_JOB_WORKERS = int(os.getenv("REPORT_JOB_WORKERS", "2"))
+LIGHT_TASK_WORKERS = int(os.getenv("LIGHT_TASK_WORKERS", "2"))
+
+_executors = {}
+_executor_lock = threading.Lock()
+
+
+def get_executor(name: str = "report-job"):
+    with _executor_lock:
+        if name not in _executors:
+            workers = REPORT_JOB_WORKERS if name == "report-job" else LIGHT_TASK_WORKERS
+            _executors[name] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        return _executors[name]
+
+
+def _with_db_cleanup(fn, *args, **kwargs):
+    # Worker threads apna DB connection khud kholte hain, purane/toote connections band karo
+    close_old_connections()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def submit(fn, *args, **kwargs):
+    """Run fn(*args, **kwargs) on the report job pool."""
+    return get_executor("report-job").submit(_with_db_cleanup, fn, *args, **kwargs)
+
+
+def submit_light(fn, *args, **kwargs):
+    """Run a short fn(*args, **kwargs) (few seconds, ek do API calls) on the light task pool."""
+    return get_executor("light-task").submit(_with_db_cleanup, fn, *args, **kwargs)
+
+
+def spawn(fn, *args, **kwargs):
+    """
+    Run fn on its own daemon thread. Streaming responses ke liye, jahan client
+    already wait kar raha hai aur job pool ke peeche queue nahi hona chahiye.
+    """
+    thread = threading.Thread(target=_with_db_cleanup, args=(fn, *args), kwargs=kwargs, daemon=True)
+    thread.start()
+    return thread
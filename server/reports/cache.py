@@ -0,0 +1,104 @@
+import hashlib
+import os
+from datetime import timedelta
+from django.db.models import F
+from django.utils import timezone
+from .models import ReportCacheEntry
+
+# ------------------------------
+# Content-hash cache for processed report PDFs
+# Same PDF dobara upload ho to Gemini/OpenAI pipeline skip ho jata hai.
+# ------------------------------
+REPORT_CACHE_ENABLED = os.getenv("REPORT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "1000"))
+REPORT_CACHE_TTL_DAYS = int(os.getenv("REPORT_CACHE_TTL_DAYS", "30"))
+# Prompt me aisa change ho jo neeche wale fields me nahi dikhta, to ye bump karo
+REPORT_CACHE_VERSION = os.getenv("REPORT_CACHE_VERSION", "2")
+
+
+def hash_pdf(pdf) -> str:
+    """pdf = file path ya upload ke bytes."""
+    if isinstance(pdf, (bytes, bytearray)):
+        return hashlib.sha256(pdf).hexdigest()
+
+    digest = hashlib.sha256()
+    with open(pdf, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def pipeline_version(extraction_mode: str, summary_mode: str) -> str:
+    """
+    Version key: prompts + model names + extraction/summary mode.
+    Inme se kuch bhi badla to purani entries apne aap miss ho jati hain.
+    """
+    # Prompts agents modules me hain; import yahan taaki cache.py import karna sasta rahe
+    from .agents import extracting_basic_details, extracting_json_details, extracting_combined_details
+    from .agents import overal_summary, yoga_prompt, text_layer, page_filter, page_rendering
+
+    parts = [
+        REPORT_CACHE_VERSION,
+        extraction_mode,
+        summary_mode,
+        extracting_basic_details.GEMINI_MODEL,
+        extracting_basic_details.system_prompt,
+        extracting_json_details.system_prompt,
+        extracting_combined_details.system_prompt,
+        overal_summary.fast_summary_prompt.messages[0].prompt.template,
+        extracting_basic_details.SUMMARY_MODEL,
+        extracting_json_details.SUMMARY_MODEL,
+        overal_summary.SUMMARY_LLM_MODEL,
+        yoga_prompt.YOUTUBE_QUERY_MODEL,
+        text_layer.TEXT_LAYER_ENABLED,
+        text_layer.TEXT_LAYER_VERSION,
+        text_layer.TEXT_LAYER_VISION_DETAILS,
+        page_filter.PAGE_SKIP_ENABLED,
+        page_filter.PAGE_BLANK_INK_RATIO,
+        page_filter.PAGE_MAX_IMAGE_COVERAGE,
+        page_filter.PAGE_BOILERPLATE_MIN_SHARE,
+        page_rendering.REPORT_RENDER_PROFILE,
+    ]
+    return hashlib.sha256("\n".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+def get_cached_report(content_hash: str, extraction_mode: str, summary_mode: str):
+    if not REPORT_CACHE_ENABLED:
+        return None
+
+    entries = ReportCacheEntry.objects.filter(
+        content_hash=content_hash,
+        version=pipeline_version(extraction_mode, summary_mode),
+        last_used_at__gte=timezone.now() - timedelta(days=REPORT_CACHE_TTL_DAYS),
+    )
+    entry = entries.first()
+    if entry is None:
+        return None
+
+    entries.update(hit_count=F("hit_count") + 1, last_used_at=timezone.now())
+    return entry.payload
+
+
+def store_cached_report(content_hash: str, extraction_mode: str, summary_mode: str, payload: dict):
+    if not REPORT_CACHE_ENABLED:
+        return
+
+    ReportCacheEntry.objects.update_or_create(
+        content_hash=content_hash,
+        version=pipeline_version(extraction_mode, summary_mode),
+        defaults={"payload": payload, "last_used_at": timezone.now()},
+    )
+    evict_stale_entries()
+
+
+def evict_stale_entries():
+    # TTL se purani entries hatao
+    ReportCacheEntry.objects.filter(
+        last_used_at__lt=timezone.now() - timedelta(days=REPORT_CACHE_TTL_DAYS)
+    ).delete()
+
+    # Max size se upar ho to least recently used entries hatao
+    stale_ids = ReportCacheEntry.objects.order_by("-last_used_at").values_list("id", flat=True)[REPORT_CACHE_MAX_ENTRIES:]
+    stale_ids = list(stale_ids)
+    if stale_ids:
+        ReportCacheEntry.objects.filter(id__in=stale_ids).delete()
@@ -0,0 +1,206 @@
+import os
+from datetime import timedelta
+from django.core.cache import cache
+from django.utils import timezone
+from .models import ChatBot, ChatMessage
+from .background import submit_light
+from .health import get_health_context
+from .retrieval import retrieve_report_context
+
+# ------------------------------
+# Chatbot: prompt building + history persistence
+# UserChatBotAPIView (ek saath poora jawab) aur StreamChatBotAPIView (token by token) dono yahi use karte hain.
+# History ChatMessage table me append hoti hai; har message par sirf last N rows padhe jate hain.
+# ------------------------------
+MAX_HISTORY = 10
+CHATBOT_MODEL = "gpt-4"
+
+# Optional: window se purane turns ko ChatBot.summary me compact karo
+CHAT_COMPACTION_ENABLED = os.getenv("CHAT_COMPACTION_ENABLED", "false").lower() in ("1", "true", "yes")
+CHAT_COMPACT_BATCH = int(os.getenv("CHAT_COMPACT_BATCH", "20"))
+
+# Semantic cache sirf standalone sawalon ke liye: itne minutes me koi message na ho tab.
+# Chalti baat me "tell me more" jaisa sawal history par depend karta hai, cache key me woh nahi hai.
+CHAT_SEMANTIC_CACHE_STANDALONE_MINUTES = int(os.getenv("CHAT_SEMANTIC_CACHE_STANDALONE_MINUTES", "30"))
+
+
+def load_history(user) -> list:
+    # Last 10 messages, (user, created_at) index se
+    rows = ChatMessage.objects.filter(user=user).order_by("-created_at", "-id").values("role", "content")[:MAX_HISTORY]
+    return list(reversed(rows))
+
+
+def has_recent_history(user) -> bool:
+    since = timezone.now() - timedelta(minutes=CHAT_SEMANTIC_CACHE_STANDALONE_MINUTES)
+    return ChatMessage.objects.filter(user=user, created_at__gte=since).exists()
+
+
+def get_report_excerpts(user, user_message: str) -> str:
+    # Sirf is sawal se related report chunks (test values, dates) - prompt chhota rehta hai
+    try:
+        return "\n\n".join(retrieve_report_context(user, user_message))
+    except Exception as e:
+        print(f"Report retrieval failed: {e}")
+        return ""
+
+
+def cache_context(health_context: str, report_excerpts: str) -> str:
+    """
+    Semantic cache key ka context = standalone prompt me jo bhi user-specific hai (profile + excerpts).
+    Standalone sawal ka prompt history / chat summary ke bina banta hai (build_chat_messages), to
+    same context wale do users ka jawab ek hi hai aur kisi ki private baat doosre tak nahi jati.
+    """
+    return f"{(health_context or '').strip()}\n\n{(report_excerpts or '').strip()}".strip()
+
+
+def lookup_cached_reply(user, user_message: str, health_context: str, report_excerpts: str = ""):
+    """
+    Opt-in semantic cache (CHAT_SEMANTIC_CACHE_ENABLED). Returns (reply ya None, embedding).
+    Embedding None = is sawal ko cache mat karo (recent history hai, context khali hai, ya cache fail hua);
+    tab chat normal LLM path par (poori history ke saath) chalta hai.
+    """
+    from .agents.semantic_cache import CHAT_SEMANTIC_CACHE_ENABLED, get_semantic_cache
+
+    context = cache_context(health_context, report_excerpts)
+    if not CHAT_SEMANTIC_CACHE_ENABLED or not context or has_recent_history(user):
+        return None, None
+    try:
+        return get_semantic_cache().lookup(user_message, context)
+    except Exception as e:
+        print(f"Semantic cache read failed: {e}")
+        return None, None
+
+
+def store_cached_reply(user_message: str, health_context: str, report_excerpts: str, reply: str, vector):
+    """vector = lookup_cached_reply ka embedding; None ho to sawal standalone nahi tha, store nahi hota."""
+    from .agents.semantic_cache import CHAT_SEMANTIC_CACHE_ENABLED, get_semantic_cache
+
+    if not CHAT_SEMANTIC_CACHE_ENABLED or not reply or vector is None:
+        return
+    try:
+        get_semantic_cache().store(user_message, cache_context(health_context, report_excerpts), reply, vector)
+    except Exception as e:
+        print(f"Semantic cache write failed: {e}")
+
+
+def build_chat_messages(user, user_message: str, health_context: str = None, report_excerpts: str = None,
+                        standalone: bool = False) -> list:
+    """
+    LangChain messages: system prompt (profile + report excerpts + purani baat) + last N turns + naya message.
+    standalone=True (semantic cache wala sawal): sirf profile + excerpts, history aur chat summary nahi,
+    kyunki jawab cache_context ke under doosre users ko bhi mil sakta hai.
+    """
+    # User ka condensed health profile as **background knowledge**
+    # (har report par incrementally update hota hai, yahan sab reports join nahi hote)
+    merged_summary = health_context if health_context is not None else get_health_context(user)
+    if report_excerpts is None:
+        report_excerpts = get_report_excerpts(user, user_message)
+
+    chatbot = None if standalone else ChatBot.objects.filter(user=user).only("summary").first()
+    history = [] if standalone else load_history(user)
+
+    # Build messages for LangChain (langchain pehli chat par hi load hota hai)
+    from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+    messages = []
+
+    # System message: background context + instructions
+    # Excerpts hon to "raw details mat batao" wali line nahi: user apni hi test value / date puchh raha hai
+    if report_excerpts:
+        access = (
+            f"You have access to the user's health information (summarized) and to excerpts from "
+            f"their own reports. When the user asks about a specific test value or report date, "
+            f"answer it directly from the excerpts. "
+        )
+    else:
+        access = (
+            f"You have access to the user's health information (summarized) "
+            f"for context, but you must never reveal raw report details. "
+        )
+    system_prompt = (
+        f"You are a helpful personal health assistant. "
+        f"{access}"
+        f"Provide advice, suggestions, or answer questions about health, "
+        f"nutrition, and wellbeing in a friendly, personalized way. "
+        f"User's health summary (for reference only, do not show to user): {merged_summary}"
+    )
+    if report_excerpts:
+        system_prompt += f"\n\nExcerpts from the user's reports relevant to this question:\n{report_excerpts}"
+    if chatbot is not None and chatbot.summary:
+        system_prompt += f"\n\nSummary of your earlier conversation with this user:\n{chatbot.summary}"
+    messages.append(SystemMessage(content=system_prompt))
+
+    # Append previous conversation history
+    for msg in history:
+        if msg["role"] == "human":
+            messages.append(HumanMessage(content=msg["content"]))
+        else:
+            messages.append(AIMessage(content=msg["content"]))
+
+    # Append current user message
+    messages.append(HumanMessage(content=user_message))
+    return messages
+
+
+def save_chat_turn(user, user_message: str, reply: str, asked_at=None):
+    """
+    Append-only insert of the turn. Do devices se ek saath messages aaye to bhi koi
+    update lost nahi hota (pehle poora JSON blob overwrite hota tha).
+    """
+    ChatMessage.objects.bulk_create([
+        ChatMessage(user=user, role="human", content=user_message, created_at=asked_at or timezone.now()),
+        ChatMessage(user=user, role="ai", content=reply, created_at=timezone.now()),
+    ])
+    if CHAT_COMPACTION_ENABLED:
+        schedule_chat_compaction(user.id)
+
+
+def compact_chat(user_id) -> bool:
+    """
+    Window (last MAX_HISTORY) se purane aur abhi tak summarize na hue turns ko
+    ChatBot.summary me fold karo, jab kam se kam CHAT_COMPACT_BATCH jama ho jayein.
+    Summary LLM call kisi lock ke bina hota hai; likhte waqt summarized_until same ho tabhi update,
+    warna doosra compaction pehle likh chuka hai aur ye result chhod diya jata hai.
+    """
+    from .agents.chat_memory import compact_chat_history
+
+    window = list(ChatMessage.objects.filter(user_id=user_id).order_by("-created_at", "-id").values_list("created_at", flat=True)[:MAX_HISTORY])
+    if len(window) < MAX_HISTORY:
+        return False
+
+    chatbot, _ = ChatBot.objects.get_or_create(user_id=user_id)
+    older = list(
+        ChatMessage.objects
+        .filter(user_id=user_id, id__gt=chatbot.summarized_until, created_at__lt=window[-1])
+        .order_by("created_at", "id")
+        .values("id", "role", "content")
+    )
+    if len(older) < CHAT_COMPACT_BATCH:
+        return False
+
+    summary = compact_chat_history(chatbot.summary, older)
+    return bool(
+        ChatBot.objects
+        .filter(pk=chatbot.pk, summarized_until=chatbot.summarized_until)
+        .update(summary=summary, summarized_until=max(msg["id"] for msg in older))
+    )
+
+
+def _compact_and_release(user_id):
+    try:
+        compact_chat(user_id)
+    except Exception as e:
+        print(f"Chat compaction failed for user {user_id}: {e}")
+    finally:
+        cache.delete(f"chat_compaction:{user_id}")
+
+
+def schedule_chat_compaction(user_id):
+    if cache.add(f"chat_compaction:{user_id}", True, 10 * 60):
+        submit_light(_compact_and_release, user_id)
+
+
+def get_chat():
+    from .agents.clients import get_chat_model
+
+    # Shared chat model (har request par naya client/connection nahi banta)
+    return get_chat_model(CHATBOT_MODEL)
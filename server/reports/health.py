@@ -0,0 +1,77 @@
+from django.utils import timezone
+from .models import HealthProfile, Report, ReportInstance
+from .background import submit_light
+
+# ------------------------------
+# Per-user rolling health profile (chatbot ka background context)
+# ReportInstance banne par background me update hota hai; chatbot sirf ye ek record padhta hai.
+# ------------------------------
+# Concurrent update jeet jaye to itni baar dobara padh kar try karo
+HEALTH_PROFILE_UPDATE_ATTEMPTS = 3
+
+
+def update_health_profile(user_id) -> HealthProfile:
+    """
+    Profile me woh saare instances fold karo jo abhi tak nahi hue (incremental + backfill dono).
+    LLM call kisi transaction / row lock ke andar nahi hota: profile padho, naya text banao,
+    phir last_instance_pk same ho tabhi likho. Beech me doosra update likh chuka ho to
+    uska result dobara padh kar bache hue instances fold karo.
+    """
+    from .agents.health_profile import update_health_profile_text, HEALTH_PROFILE_MODEL
+    from .agents.tokens import count_tokens
+
+    profile, _ = HealthProfile.objects.get_or_create(user_id=user_id)
+    for _ in range(HEALTH_PROFILE_UPDATE_ATTEMPTS):
+        new_instances = list(
+            ReportInstance.objects
+            .filter(report__user_id=user_id, pk__gt=profile.last_instance_pk)
+            .order_by("pk")
+            .values_list("pk", "instance_summary")
+        )
+        if not new_instances:
+            return profile
+
+        summary = update_health_profile_text(profile.summary, [summary for _, summary in new_instances])
+        changes = {
+            "summary": summary,
+            "token_count": count_tokens(summary, HEALTH_PROFILE_MODEL),
+            "instance_count": profile.instance_count + len(new_instances),
+            "last_instance_pk": new_instances[-1][0],
+            "updated_at": timezone.now(),
+        }
+        if HealthProfile.objects.filter(pk=profile.pk, last_instance_pk=profile.last_instance_pk).update(**changes):
+            for field, value in changes.items():
+                setattr(profile, field, value)
+            return profile
+        profile.refresh_from_db()
+    return profile
+
+
+def _update_quietly(user_id):
+    try:
+        update_health_profile(user_id)
+    except Exception as e:
+        print(f"Health profile update failed for user {user_id}: {e}")
+
+
+def schedule_health_profile_update(user_id):
+    submit_light(_update_quietly, user_id)
+
+
+def get_health_context(user) -> str:
+    """
+    Chatbot ke liye condensed profile. Profile abhi bana nahi (purane users) to
+    background me build schedule karo aur tab tak report summaries ka bounded join do.
+    """
+    profile = HealthProfile.objects.filter(user=user).only("summary").first()
+    if profile is not None and profile.summary:
+        return profile.summary
+
+    if profile is None:
+        schedule_health_profile_update(user.id)
+
+    from .agents.health_profile import HEALTH_PROFILE_MODEL, HEALTH_PROFILE_TOKEN_BUDGET
+    from .agents.tokens import truncate_tokens
+    summaries = Report.objects.filter(user=user).order_by("-created_at").values_list("overall_summary", flat=True)
+    merged_summary = " ".join(s for s in summaries if s)
+    return truncate_tokens(merged_summary, HEALTH_PROFILE_TOKEN_BUDGET, HEALTH_PROFILE_MODEL)
@@ -0,0 +1,117 @@
+import os
+from datetime import timedelta
+from django.core.cache import caches
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from .models import ReportJob
+from .background import submit
+from .pipeline import run_report_pipeline, PIPELINE_STAGES, STAGE_PENDING
+from .recommendations import schedule_youtube_videos
+
+# ------------------------------
+# Report jobs (state DB me ReportJob table me rehta hai)
+# Queue sirf process ke andar hai: worker restart / timeout kill par woh kho jati hai.
+# recover_report_jobs() aise jobs ko wapas queue karta hai (queued) ya failed mark karta hai (running).
+# ------------------------------
+# Itni der se update nahi hua running job = worker mar gaya
+REPORT_JOB_STALE_MINUTES = int(os.getenv("REPORT_JOB_STALE_MINUTES", "30"))
+# Itni der se queued job = shayad kisi mare hue worker ki queue me tha
+REPORT_JOB_REQUEUE_MINUTES = int(os.getenv("REPORT_JOB_REQUEUE_MINUTES", "2"))
+REPORT_JOB_RECOVERY_INTERVAL = 60   # seconds, sab workers milake itne me ek sweep (shared cache)
+
+def create_report_job(user, report, uploaded_file, extraction_mode=None, summary_mode=None):
+    file_path = default_storage.save(f"temp/{uploaded_file.name}", uploaded_file)
+    return ReportJob.objects.create(
+        user=user,
+        report=report,
+        file_name=uploaded_file.name,
+        file_path=file_path,
+        extraction_mode=extraction_mode,
+        summary_mode=summary_mode,
+        stages={stage: STAGE_PENDING for stage in PIPELINE_STAGES},
+    )
+
+
+def enqueue_report_job(job):
+    return submit(run_report_job, job.id)
+
+
+def _remove_job_file(job):
+    try:
+        if job.file_path and default_storage.exists(job.file_path):
+            default_storage.delete(job.file_path)
+    except Exception as e:
+        print(f"Could not remove file of report job {job.id}: {e}")
+
+
+def recover_report_jobs():
+    """
+    Stale running jobs -> failed (file bhi hatao), purane queued jobs -> dobara enqueue.
+    Status poll par web worker me call hota hai; shared cache key se sab workers milake
+    sweep takreeban har minute ek baar.
+    """
+    if not caches["shared"].add("report_jobs_recovery", True, REPORT_JOB_RECOVERY_INTERVAL):
+        return
+
+    now = timezone.now()
+    stale = ReportJob.objects.filter(status="running", updated_at__lt=now - timedelta(minutes=REPORT_JOB_STALE_MINUTES))
+    _fail_running_jobs(stale, now)
+
+    waiting = ReportJob.objects.filter(status="queued", updated_at__lt=now - timedelta(minutes=REPORT_JOB_REQUEUE_MINUTES))
+    for job in waiting:
+        # updated_at touch, warna har sweep par dobara enqueue hota
+        if ReportJob.objects.filter(pk=job.pk, status="queued", updated_at=job.updated_at).update(updated_at=now):
+            enqueue_report_job(job)
+
+
+def fail_interrupted_report_jobs():
+    """
+    Server start par (gunicorn se pehle): abhi koi worker chal hi nahi raha, to har running job mara hua hai.
+    Sirf status badalta hai, kuch enqueue nahi hota - command ka pool exit par join hota aur
+    gunicorn tab tak start nahi hota. Queued jobs queued rehte hain, web workers ki sweep unhe uthati hai.
+    """
+    return _fail_running_jobs(ReportJob.objects.filter(status="running"), timezone.now())
+
+
+def _fail_running_jobs(jobs, now):
+    failed = 0
+    for job in jobs:
+        # Filter dobara taaki beech me complete hua job overwrite na ho
+        if ReportJob.objects.filter(pk=job.pk, status="running").update(
+            status="failed", error="Worker stopped while processing the report. Please upload again.", updated_at=now
+        ):
+            _remove_job_file(job)
+            failed += 1
+    return failed
+
+
+def run_report_job(job_id):
+    # Job claim karo: same job do queues me ho (recovery ke baad) to bhi ek hi baar chalega
+    if not ReportJob.objects.filter(pk=job_id, status="queued").update(status="running", updated_at=timezone.now()):
+        return
+    job = ReportJob.objects.select_related("report").get(pk=job_id)
+
+    def on_stage(stage, state):
+        job.stage = stage
+        job.stages[stage] = state
+        job.save(update_fields=["stage", "stages", "updated_at"])
+
+    full_path = default_storage.path(job.file_path)
+    try:
+        result = run_report_pipeline(
+            job.report, full_path, job.file_name,
+            extraction_mode=job.extraction_mode, summary_mode=job.summary_mode,
+            on_stage=on_stage
+        )
+        job.instance = result["instance"]
+        job.status = "completed"
+        job.save(update_fields=["instance", "status", "updated_at"])
+        schedule_youtube_videos(job.instance.id, result["youtube_query"])
+    except Exception as e:
+        print(f"Report job {job_id} failed: {e}")
+        job.status = "failed"
+        job.error = str(e)
+        job.save(update_fields=["status", "error", "updated_at"])
+    finally:
+        if os.path.exists(full_path):
+            os.remove(full_path)
@@ -0,0 +1,89 @@
+import hashlib
+import time
+from django.core.cache import caches
+from django.utils.http import http_date
+
+# ------------------------------
+# Report listing ke liye per-user version + serialized body cache
+# Version ReportInstance/Report save ya delete par bump hota hai (signals.py).
+# App aur bot list baar baar poll karte hain; version same ho to 304 ya cached body,
+# Postgres tak request jati hi nahi.
+# ------------------------------
+REPORT_LIST_CACHE_TTL = 24 * 3600
+
+
+def _cache():
+    return caches["shared"]
+
+
+def _version_key(user_id):
+    return f"report_list_version:{user_id}"
+
+
+def get_list_version(user_id) -> int:
+    """
+    Version = last change ka time (ns). Key na ho (cache clear/expire) to abhi ka time,
+    taaki client ka purana ETag kabhi galti se match na ho.
+    """
+    version = _cache().get(_version_key(user_id))
+    if version is None:
+        version = time.time_ns()
+        if not _cache().add(_version_key(user_id), version, None):
+            version = _cache().get(_version_key(user_id), version)
+    return version
+
+
+def bump_list_version(user_id):
+    try:
+        _cache().set(_version_key(user_id), time.time_ns(), None)
+    except Exception as e:
+        print(f"Report list version bump failed for user {user_id}: {e}")
+
+
+def list_variant(query_params) -> str:
+    """Same user ke alag query params (pk, fields, cursor, page_size) alag responses hain."""
+    params = sorted((key, value) for key, value in query_params.items() if key in ("pk", "fields", "cursor", "page_size"))
+    return hashlib.sha1(repr(params).encode("utf-8")).hexdigest()[:12]
+
+
+def list_etag(user_id, version, variant) -> str:
+    return f'"{user_id}-{version}-{variant}"'
+
+
+def last_modified(version) -> str:
+    return http_date(version // 1_000_000_000)
+
+
+def is_not_modified(request, etag) -> bool:
+    """
+    Sirf If-None-Match. If-Modified-Since second resolution ka hai, ek hi second me do
+    changes (instance create + report.save) ho to client ko purana data 304 ke saath milta.
+    Last-Modified header sirf jaankari ke liye bheja jata hai.
+    """
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match:
+        return False
+    return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+
+
+def _body_key(user_id, variant):
+    # Har user + variant ki ek hi entry (latest version ki), purani versions ki bodies jama nahi hoti
+    return f"report_list_body:{user_id}:{variant}"
+
+
+def get_cached_body(user_id, version, variant):
+    try:
+        cached = _cache().get(_body_key(user_id, variant))
+    except Exception as e:
+        print(f"Report list cache read failed: {e}")
+        return None
+    if cached is None or cached[0] != version:
+        return None
+    return cached[1]
+
+
+def set_cached_body(user_id, version, variant, data):
+    try:
+        _cache().set(_body_key(user_id, variant), (version, data), REPORT_LIST_CACHE_TTL)
+    except Exception as e:
+        print(f"Report list cache write failed: {e}")
@@ -0,0 +1,73 @@
+import json
+import statistics
+import subprocess
+import sys
+from django.core.management.base import BaseCommand
+
+# ------------------------------
+# Import-time benchmark
+# Har module fresh interpreter me import hota hai (warna sys.modules cache number bigaad deta hai).
+# "agents" row batata hai ki pehli report process hone par lazily kitna load hota hai,
+# yani purane eager imports wala cost jo ab har worker boot par nahi lagta.
+# ------------------------------
+DEFAULT_MODULES = ["server.urls", "reports.views", "diet.views", "authentication.urls", "userDeets.urls"]
+AGENT_MODULES = [
+    "reports.agents.extracting_combined_details",
+    "reports.agents.overal_summary",
+    "reports.agents.yoga_prompt",
+    "reports.agents.youtube_scrapping",
+]
+HEAVY_MODULES = [
+    "fitz", "PIL.Image", "google.genai", "google.generativeai", "googleapiclient.discovery",
+    "langchain_core", "langchain_openai", "langgraph", "tiktoken",
+]
+
+_PROBE = """
+import importlib, json, os, sys, time
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "server.settings")
+import django
+django.setup()
+start = time.perf_counter()
+for name in sys.argv[1].split(","):
+    importlib.import_module(name)
+elapsed = (time.perf_counter() - start) * 1000
+heavy = [m for m in json.loads(sys.argv[2]) if m in sys.modules]
+print(json.dumps({"ms": elapsed, "heavy": heavy}))
+"""
+
+
+def measure(modules, repeat):
+    """Median import time (ms) over `repeat` fresh interpreters + heavy modules jo load hue."""
+    timings, heavy = [], []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE, ",".join(modules), json.dumps(HEAVY_MODULES)],
+            capture_output=True, text=True, check=True,
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        timings.append(result["ms"])
+        heavy = result["heavy"]
+    return statistics.median(timings), heavy
+
+
+class Command(BaseCommand):
+    help = "Measure cold import time of URL/view modules and the lazily loaded report agents."
+
+    def add_arguments(self, parser):
+        parser.add_argument("modules", nargs="*", help="Modules to time (default: URL confs + views)")
+        parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per module")
+
+    def handle(self, *args, **options):
+        modules = options["modules"] or DEFAULT_MODULES
+        repeat = options["repeat"]
+
+        rows = [(name, [name]) for name in modules]
+        rows.append(("agents (first report)", AGENT_MODULES))
+
+        for label, names in rows:
+            try:
+                ms, heavy = measure(names, repeat)
+            except subprocess.CalledProcessError as e:
+                self.stderr.write(f"{label}: import failed\n{e.stderr}")
+                continue
+            self.stdout.write(f"{label:<28} {ms:8.1f} ms   heavy: {', '.join(heavy) or '-'}")
@@ -0,0 +1,83 @@
+import json
+import re
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# ------------------------------
+# Render profile benchmark
+# Har profile ke liye fixture PDFs render karo: payload bytes, render time, aur --extract
+# ke saath Gemini extraction latency + accuracy (expected test values kitne sahi nikle).
+# Sabse sasta profile jo best accuracy deta hai, wahi REPORT_RENDER_PROFILE me lagao.
+# ------------------------------
+DEFAULT_FIXTURES = settings.BASE_DIR / "reports" / "agents" / "render_fixtures.json"
+
+
+def _normalize(name: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def count_matches(expected, tests) -> int:
+    """Expected test tab match hai jab naam ek dusre me aaye aur value 0.5% ke andar ho."""
+    matched = 0
+    for item in expected:
+        name, value = _normalize(item["Name"]), float(item["Found"])
+        if any(
+            (name in _normalize(test.Name) or _normalize(test.Name) in name)
+            and abs(test.Found - value) <= max(abs(value) * 0.005, 1e-6)
+            for test in tests
+        ):
+            matched += 1
+    return matched
+
+
+class Command(BaseCommand):
+    help = "Compare page render profiles: payload bytes, latency and extraction accuracy on a fixture set."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fixtures", default=str(DEFAULT_FIXTURES), help="JSON with files + expected tests")
+        parser.add_argument("--profiles", nargs="*", help="Profiles to compare (default: all + adaptive)")
+        parser.add_argument("--extract", action="store_true", help="Call Gemini and measure latency/accuracy")
+
+    def handle(self, *args, **options):
+        from reports.agents.page_rendering import RENDER_PROFILES, ADAPTIVE_PROFILE, render_pdf_pages
+        from reports.agents.extracting_combined_details import extract_combined_from_page
+
+        with open(options["fixtures"]) as f:
+            fixtures = json.load(f)["files"]
+        profiles = options["profiles"] or [*RENDER_PROFILES, ADAPTIVE_PROFILE]
+
+        results = []
+        for profile in profiles:
+            row = {"profile": profile, "pages": 0, "bytes": 0, "render_ms": 0.0, "extract_ms": 0.0, "matched": 0, "expected": 0}
+            for fixture in fixtures:
+                with open(settings.BASE_DIR / fixture["path"], "rb") as f:
+                    pdf = f.read()
+
+                start = time.perf_counter()
+                pages = render_pdf_pages(pdf, profile)
+                row["render_ms"] += (time.perf_counter() - start) * 1000
+                row["pages"] += len(pages)
+                row["bytes"] += sum(len(page.image_bytes) for page in pages)
+
+                if options["extract"]:
+                    # Page cache bypass (__wrapped__), warna dusre run me latency 0 aati hai
+                    start = time.perf_counter()
+                    combined = [extract_combined_from_page.__wrapped__(page) for page in pages]
+                    row["extract_ms"] += (time.perf_counter() - start) * 1000
+                    tests = [test for page in combined if page for test in page.tests]
+                    row["matched"] += count_matches(fixture["tests"], tests)
+                    row["expected"] += len(fixture["tests"])
+            results.append(row)
+
+            pages = max(row["pages"], 1)
+            line = f"{profile:<10} {row['pages']:3d} pages  {row['bytes'] / 1024 / pages:7.1f} KB/page  render {row['render_ms'] / pages:6.1f} ms/page"
+            if options["extract"]:
+                accuracy = row["matched"] / max(row["expected"], 1)
+                line += f"  extract {row['extract_ms'] / pages:7.1f} ms/page  accuracy {row['matched']}/{row['expected']} ({accuracy:.0%})"
+            self.stdout.write(line)
+
+        if options["extract"] and results:
+            best = max(row["matched"] for row in results)
+            cheapest = min((row for row in results if row["matched"] == best), key=lambda row: row["bytes"])
+            self.stdout.write(f"Cheapest profile at best accuracy: {cheapest['profile']}")
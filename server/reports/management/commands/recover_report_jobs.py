@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from reports.jobs import fail_interrupted_report_jobs
+
+
+class Command(BaseCommand):
+    help = "Fail report jobs left running by the previous server run (run at server startup, before gunicorn)."
+
+    def handle(self, *args, **options):
+        failed = fail_interrupted_report_jobs()
+        self.stdout.write(f"Report job recovery done ({failed} interrupted jobs failed).")
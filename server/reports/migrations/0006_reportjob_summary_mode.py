@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-16 20:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0005_reportcacheentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportjob',
+            name='summary_mode',
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+    ]
@@ -0,0 +1,40 @@
+import json
+from datetime import timedelta
+from django.db import migrations
+from django.utils import timezone
+
+
+def copy_memory_to_messages(apps, schema_editor):
+    """ChatBot.memory ka JSON array -> ChatMessage rows (order same rehta hai)."""
+    ChatBot = apps.get_model('reports', 'ChatBot')
+    ChatMessage = apps.get_model('reports', 'ChatMessage')
+
+    for chatbot in ChatBot.objects.exclude(memory__isnull=True).exclude(memory='').iterator():
+        try:
+            history = json.loads(chatbot.memory)
+        except json.JSONDecodeError:
+            continue
+
+        # Purane messages me timestamp nahi tha, isliye order bachane ke liye 1ms ka gap
+        start = timezone.now() - timedelta(milliseconds=len(history))
+        ChatMessage.objects.bulk_create([
+            ChatMessage(
+                user_id=chatbot.user_id,
+                role='human' if msg.get('role') == 'human' else 'ai',
+                content=msg.get('content') or '',
+                created_at=start + timedelta(milliseconds=i),
+            )
+            for i, msg in enumerate(history)
+            if isinstance(msg, dict)
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0008_chatmessage'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_memory_to_messages, migrations.RunPython.noop),
+    ]
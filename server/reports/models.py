@@ -1,4 +1,6 @@
+import uuid
 from django.db import models
+from django.utils import timezone
 from authentication.models import User
 
 class Report(models.Model):
@@ -41,7 +43,90 @@ class ReportInstance(models.Model):   # 👈 plural hataya, singular rakha
 
 class ChatBot(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chatbots')
-    memory = models.TextField(null=True, blank=True)
+    memory = models.TextField(null=True, blank=True)   # purana JSON history, ab ChatMessage me hai (sirf read-only rollback ke liye)
+    summary = models.TextField(blank=True, default='')   # compacted older turns
+    summarized_until = models.BigIntegerField(default=0)   # is ChatMessage id tak ke turns summary me hain
 
     def __str__(self):
-        return f"ChatBot - {self.user.username} - {self.report.title}"
\ No newline at end of file
+        return f"ChatBot - {self.user.username} - {self.report.title}"
+
+
+class ChatMessage(models.Model):
+    """One chat turn message. Append-only; chatbot sirf last N rows padhta hai."""
+
+    ROLE_CHOICES = [
+        ('human', 'Human'),
+        ('ai', 'AI'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chat_messages')
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+    content = models.TextField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=['user', 'created_at'])]
+
+    def __str__(self):
+        return f"ChatMessage - {self.user_id} - {self.role}"
+
+
+class HealthProfile(models.Model):
+    """
+    Per-user condensed health context for the chatbot. Har naye ReportInstance par
+    incrementally update hota hai (last_instance_pk ke baad wale instances fold hote hain).
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='health_profile')
+    summary = models.TextField(blank=True, default='')
+    token_count = models.IntegerField(default=0)
+    instance_count = models.IntegerField(default=0)   # kitne instances fold ho chuke hain
+    last_instance_pk = models.IntegerField(default=0)  # is id tak ke ReportInstance fold ho chuke hain
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"HealthProfile - {self.user_id}"
+
+
+class ReportJob(models.Model):
+    """Background report processing job (UploadReportView async mode)."""
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='report_jobs')
+    report = models.ForeignKey(Report, on_delete=models.CASCADE, related_name='jobs')
+    instance = models.ForeignKey(ReportInstance, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    file_name = models.TextField()
+    file_path = models.TextField()   # default_storage path of the temp PDF
+    extraction_mode = models.CharField(max_length=20, null=True, blank=True)
+    summary_mode = models.CharField(max_length=20, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    stage = models.CharField(max_length=50, null=True, blank=True)
+    stages = models.JSONField(default=dict, blank=True)   # {stage: pending/running/done/failed}
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"ReportJob {self.id} - {self.status}"
+
+
+class ReportCacheEntry(models.Model):
+    """Processed pipeline output keyed by sha256 of the PDF bytes + pipeline version."""
+    content_hash = models.CharField(max_length=64)
+    version = models.CharField(max_length=64)   # prompts/models ka hash, badla to entry stale
+    payload = models.JSONField()
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        unique_together = ('content_hash', 'version')
+
+    def __str__(self):
+        return f"ReportCacheEntry {self.content_hash[:12]} ({self.hit_count} hits)"
@@ -0,0 +1,173 @@
+from contextlib import contextmanager
+from .models import ReportInstance
+from .cache import hash_pdf, get_cached_report, store_cached_report
+from .health import schedule_health_profile_update
+from .retrieval import schedule_report_indexing
+from .agents.modes import DEFAULT_EXTRACTION_MODE, DEFAULT_SUMMARY_MODE, FAST_SUMMARY, MULTI_STAGE_SUMMARY
+
+# Agents (fitz, genai, langchain, tiktoken...) yahan import nahi hote, pehli report
+# process hone par hi load hote hain. Isse gunicorn workers aur manage.py commands
+# fast boot karte hain aur auth/userDeets/diet endpoints ko ye cost nahi lagti.
+
+# Order me chalne wale stages (job status endpoint yahi dikhata hai)
+# YouTube recommendations yahan nahi hain, woh save ke baad background me bharte hain (recommendations.py)
+PIPELINE_STAGES = ["rendering", "extracting", "summarizing", "saving"]
+
+STAGE_PENDING = "pending"
+STAGE_RUNNING = "running"
+STAGE_DONE = "done"
+STAGE_FAILED = "failed"
+STAGE_CACHED = "cached"
+
+
+@contextmanager
+def _stage(on_stage, name):
+    on_stage(name, STAGE_RUNNING)
+    try:
+        yield
+    except Exception:
+        on_stage(name, STAGE_FAILED)
+        raise
+    on_stage(name, STAGE_DONE)
+
+
+def _page_event(page):
+    from .agents.extracting_basic_details import PageReport
+    name = "page_details" if isinstance(page, PageReport) else "page_tests"
+    return name, page.model_dump()
+
+
+def process_pdf(pdf, extraction_mode, summary_mode, on_stage, on_result):
+    """
+    Gemini/OpenAI wala heavy part. Returns the payload that ReportInstance is built from
+    (ye hi content-hash cache me store hota hai).
+    """
+    from .agents.page_rendering import render_pdf_pages
+    from .agents.extracting_basic_details import generate_report_summary as generate_basic_summary
+    from .agents.extracting_json_details import generate_report_summary as generate_json_summary
+    from .agents.extracting_combined_details import extract_pages
+    from .agents.page_filter import skipped_pages
+    from .agents.overal_summary import generate_final_summary, generate_fast_summary
+
+    # -------------------------------
+    # Rasterize every page once, shared by both extraction passes
+    # -------------------------------
+    with _stage(on_stage, "rendering"):
+        pages = render_pdf_pages(pdf)
+
+    # -------------------------------
+    # Extract report details + test results
+    # (combined = 1 Gemini call per page, two_call = purana 2 call path)
+    # -------------------------------
+    with _stage(on_stage, "extracting"):
+        page_reports, page_results = extract_pages(
+            pages, mode=extraction_mode,
+            on_page=lambda page: on_result(*_page_event(page))
+        )
+        structured_json = [r.dict() for r in page_reports]
+        test_json = [r.dict() for r in page_results]
+
+    # -------------------------------
+    # Polished final summary using OpenAI
+    # fast = 1 structured call (summary + YouTube query), report bada ho to multi-stage fallback
+    # -------------------------------
+    with _stage(on_stage, "summarizing"):
+        fast = generate_fast_summary(structured_json, test_json) if summary_mode == FAST_SUMMARY else None
+        if fast:
+            final_summary_text, youtube_query = fast.final_summary, fast.youtube_query
+        else:
+            summary_mode = MULTI_STAGE_SUMMARY
+            basic_summary = generate_basic_summary(page_reports)
+            test_summary = generate_json_summary(page_results)
+            final_summary_text = generate_final_summary(
+                basic_details=structured_json[0].get("details") if structured_json else {},
+                summary=f"{basic_summary}\n\n{test_summary}"
+            )
+            youtube_query = None
+        on_result("summary", final_summary_text)
+
+    return {
+        "json": {
+            "structured_details": structured_json,
+            "test_details": test_json,
+            "extraction_mode": extraction_mode,
+            "summary_mode": summary_mode,
+            "youtube_query": youtube_query,
+            # Har page kaise parse hua: "text" (PDF text layer), "vision" (Gemini) ya "skipped"
+            "page_methods": [
+                {"page_number": page.page_number, "method": page.method, "render_profile": page.profile}
+                for page in pages
+            ],
+            "skipped_pages": skipped_pages(pages),
+            # Gemini error / parse failure wale pages; aisa payload report cache me nahi jata
+            "failed_pages": [page.page_number for page in pages if page.failed],
+        },
+        "instance_summary": final_summary_text,
+        "name_of_the_doctor": page_reports[0].details.doctor_name if page_reports else "",
+        "address_of_the_doctor": page_reports[0].details.hospital_address if page_reports else "",
+    }
+
+
+def _replay_payload(payload, on_result):
+    # Cache hit par bhi streaming clients ko wahi events milte hain
+    for page in payload["json"]["structured_details"]:
+        on_result("page_details", page)
+    for page in payload["json"]["test_details"]:
+        on_result("page_tests", page)
+    on_result("summary", payload["instance_summary"])
+
+
+def run_report_pipeline(
+    report, pdf, file_name, extraction_mode=None, summary_mode=None,
+    on_stage=None, on_result=None, use_cache=True
+):
+    """
+    PDF -> extraction -> summaries -> ReportInstance.
+    pdf = upload ke bytes (memory me process hota hai) ya badi file ka disk path (uploads.py).
+    on_stage(stage, state) har stage ke start/end par call hota hai (progress ke liye).
+    on_result(name, data) partial results ke liye: page_details, page_tests, summary.
+    Same PDF pehle process ho chuka hai to cached payload se turant instance banta hai.
+    Returns dict with instance, final_summary, structured_json, youtube_query (fast mode
+    ne diya ho to, warna None) and cached flag. youtube_videos caller schedule karta hai.
+    """
+    on_stage = on_stage or (lambda stage, state: None)
+    on_result = on_result or (lambda name, data: None)
+    extraction_mode = extraction_mode or DEFAULT_EXTRACTION_MODE
+    summary_mode = summary_mode or DEFAULT_SUMMARY_MODE
+
+    content_hash = hash_pdf(pdf) if use_cache else None
+    payload = get_cached_report(content_hash, extraction_mode, summary_mode) if content_hash else None
+    cached = payload is not None
+
+    if cached:
+        for stage in PIPELINE_STAGES[:-1]:
+            on_stage(stage, STAGE_CACHED)
+        _replay_payload(payload, on_result)
+    else:
+        payload = process_pdf(pdf, extraction_mode, summary_mode, on_stage, on_result)
+        # Kisi page ka extraction fail hua ho to cache mat karo, warna 30 din tak wahi adhoora result milta
+        if content_hash and not payload["json"]["failed_pages"]:
+            store_cached_report(content_hash, extraction_mode, summary_mode, payload)
+
+    # -------------------------------
+    # Save ReportInstance (without instance_name)
+    # -------------------------------
+    with _stage(on_stage, "saving"):
+        instance = ReportInstance.objects.create(report=report, file=file_name, **payload)
+
+        # Update Report's overall_summary
+        report.overall_summary = payload["instance_summary"]
+        report.save()
+
+    # Chatbot ka health profile background me is instance ko fold karega,
+    # aur RAG index me iske chunks add honge
+    schedule_health_profile_update(report.user_id)
+    schedule_report_indexing(instance.id)
+
+    return {
+        "instance": instance,
+        "final_summary": payload["instance_summary"],
+        "structured_json": payload["json"]["structured_details"],
+        "youtube_query": payload["json"].get("youtube_query"),
+        "cached": cached,
+    }
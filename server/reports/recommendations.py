@@ -0,0 +1,78 @@
+import json
+import os
+from django.core.cache import caches
+from .models import ReportInstance
+from .background import submit_light
+from .list_cache import bump_list_version
+
+# ------------------------------
+# YouTube recommendations (report upload ke critical path se bahar)
+# Instance pehle save hota hai, youtube_videos baad me background me bharta hai.
+# ------------------------------
+YOUTUBE_MAX_RESULTS = 5
+# Fill fail hua to itni der tak reads par dobara schedule nahi hota (har read par naya GPT/YouTube call nahi)
+YOUTUBE_RETRY_BACKOFF_SECONDS = int(os.getenv("YOUTUBE_RETRY_BACKOFF_SECONDS", str(60 * 60)))
+
+
+def _cache():
+    # Pending / backoff keys saare gunicorn workers ke beech shared
+    return caches["shared"]
+
+
+def fetch_youtube_videos(youtube_query: str) -> list:
+    from .agents.youtube_scrapping import youtube_search
+
+    # youtube_search khud normalized query par persistent cache karta hai,
+    # to similar conditions wale users ek hi lookup share karte hain
+    return json.loads(youtube_search(youtube_query, max_results=YOUTUBE_MAX_RESULTS))
+
+
+def fill_youtube_videos(instance_id, youtube_query=None) -> list:
+    """Compute and store youtube_videos for one instance (background task)."""
+    from .agents.yoga_prompt import get_youtube_query
+
+    instance = ReportInstance.objects.select_related("report").get(pk=instance_id)
+    data = instance.json or {}
+    youtube_query = youtube_query or data.get("youtube_query")
+    if not youtube_query:
+        # GPT se bani query pehle save karo, search fail ho to retry par dobara GPT call na lage
+        youtube_query = get_youtube_query(instance.instance_summary or "")
+        ReportInstance.objects.filter(pk=instance_id).update(json={**data, "youtube_query": youtube_query})
+        bump_list_version(instance.report.user_id)
+    videos = fetch_youtube_videos(youtube_query)
+    ReportInstance.objects.filter(pk=instance_id).update(youtube_videos=videos)
+    bump_list_version(instance.report.user_id)   # update() par signal nahi aata
+    return videos
+
+
+def _fill_and_release(instance_id, youtube_query=None):
+    try:
+        fill_youtube_videos(instance_id, youtube_query)
+    except Exception as e:
+        print(f"YouTube recommendations failed for instance {instance_id}: {e}")
+        _cache().set(f"youtube_failed:{instance_id}", True, YOUTUBE_RETRY_BACKOFF_SECONDS)
+    finally:
+        _cache().delete(f"youtube_pending:{instance_id}")
+
+
+def schedule_youtube_videos(instance_id, youtube_query=None):
+    """
+    Light task pool par fill schedule karo. Ek instance ke liye ek hi task chalta hai
+    (read par lazily trigger hone par bhi duplicate nahi banega).
+    """
+    if _cache().add(f"youtube_pending:{instance_id}", True, 10 * 60):
+        submit_light(_fill_and_release, instance_id, youtube_query)
+
+
+def schedule_missing_youtube_videos(instances):
+    """
+    Computed on first read: jin instances me youtube_videos abhi tak nahi hai, unke liye fill schedule karo.
+    Haal hi me fail hue instances backoff tak skip hote hain.
+    """
+    missing = [instance.id for instance in instances if instance.youtube_videos is None]
+    if not missing:
+        return
+    failed = _cache().get_many([f"youtube_failed:{instance_id}" for instance_id in missing])
+    for instance_id in missing:
+        if f"youtube_failed:{instance_id}" not in failed:
+            schedule_youtube_videos(instance_id)
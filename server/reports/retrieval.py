@@ -0,0 +1,109 @@
+import os
+import re
+from django.core.cache import cache
+from .models import ReportInstance
+from .background import submit_light
+
+# ------------------------------
+# Report RAG: ReportInstance summary + test values ke chunks ek local vector index me.
+# Upload par naya instance index hota hai; chatbot har sawal par sirf top-k chunks padhta hai.
+# ------------------------------
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", "5"))
+TESTS_PER_CHUNK = 8
+SUMMARY_CHUNK_CHARS = 1200
+
+
+def _report_label(instance) -> str:
+    date = instance.date_of_the_report.strftime("%d %B %Y") if instance.date_of_the_report else "unknown date"
+    label = f"Report '{instance.report.title}' dated {date}"
+    if instance.name_of_the_doctor:
+        label += f" ({instance.name_of_the_doctor})"
+    return label
+
+
+def _split_summary(summary: str):
+    # Sentences ko ~SUMMARY_CHUNK_CHARS ke chunks me pack karo
+    chunks, current = [], ""
+    for sentence in re.split(r"(?<=[.!?])\s+", summary.strip()):
+        if current and len(current) + len(sentence) > SUMMARY_CHUNK_CHARS:
+            chunks.append(current)
+            current = ""
+        current = f"{current} {sentence}".strip()
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def chunk_report_instance(instance) -> list:
+    """Ek instance ke searchable text chunks (har chunk me report ka naam aur date bhi)."""
+    label = _report_label(instance)
+    chunks = [f"{label} summary: {part}" for part in _split_summary(instance.instance_summary or "")]
+
+    tests = []
+    for page in (instance.json or {}).get("test_details") or []:
+        for test in page.get("tests") or []:
+            line = f"{test.get('Name')}: {test.get('Found')}"
+            if test.get("Range"):
+                line += f" (normal range {test['Range']})"
+            tests.append(line)
+
+    for i in range(0, len(tests), TESTS_PER_CHUNK):
+        chunks.append(f"{label} test results:\n" + "\n".join(tests[i:i + TESTS_PER_CHUNK]))
+    return chunks
+
+
+def index_report_instance(instance_id):
+    from .agents.vector_index import get_index
+
+    instance = ReportInstance.objects.select_related("report").get(pk=instance_id)
+    get_index().add(instance.report.user_id, instance.id, chunk_report_instance(instance))
+
+
+def _index_and_release(instance_id):
+    try:
+        index_report_instance(instance_id)
+    except Exception as e:
+        print(f"Report indexing failed for instance {instance_id}: {e}")
+    finally:
+        cache.delete(f"rag_pending:{instance_id}")
+
+
+def schedule_report_indexing(instance_id):
+    if cache.add(f"rag_pending:{instance_id}", True, 10 * 60):
+        submit_light(_index_and_release, instance_id)
+
+
+def forget_report_instance(instance_id):
+    from .agents.vector_index import get_index
+
+    try:
+        get_index().delete_instances([instance_id])
+    except Exception as e:
+        print(f"Report index cleanup failed for instance {instance_id}: {e}")
+
+
+def retrieve_report_context(user, question: str, k: int = None) -> list:
+    """
+    Question ke liye user ke top-k report chunks. Jo instances abhi index nahi hue
+    (upload ke pehle ke, ya indexing fail hui) unhe background me index schedule karo.
+    """
+    from .agents.vector_index import get_index
+
+    index = get_index()
+    # Index pehle padho: beech me naya instance index ho jaye to woh stale na samjha jaye
+    indexed = index.indexed_instances(user.id)
+    instance_ids = set(ReportInstance.objects.filter(report__user=user).values_list("id", flat=True))
+
+    # Deleted instances ke bache hue chunks (signal cleanup fail hua ho, ya signal se pehle ke).
+    # Search pehle top-k leta hai, stale chunks rahe to woh slots kha jate.
+    stale = indexed - instance_ids
+    if stale:
+        index.delete_instances(stale)
+    if not instance_ids:
+        return []
+
+    for instance_id in instance_ids - indexed:
+        schedule_report_indexing(instance_id)
+
+    results = index.search(user.id, question, k or RAG_TOP_K)
+    return [text for text, instance_id, _ in results if instance_id in instance_ids]
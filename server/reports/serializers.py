@@ -1,7 +1,23 @@
 from rest_framework import serializers
-from .models import ReportInstance
+from .models import ReportInstance, ReportJob
 
-class ReportInstanceSerializer(serializers.ModelSerializer):
+class FieldsSelectorMixin:
+    """
+    `fields` kwarg se sirf chune hue fields serialize karo (`?fields=id,instance_summary`).
+    Unknown field names par ValueError, view use 400 me badalta hai.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            unknown = set(fields) - set(self.fields)
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class ReportInstanceSerializer(FieldsSelectorMixin, serializers.ModelSerializer):
     report_title = serializers.CharField(source="report.title", read_only=True)
 
     class Meta:
@@ -17,3 +33,30 @@ class ReportInstanceSerializer(serializers.ModelSerializer):
             "file",
             "youtube_videos",
         ]
+
+
+class ReportInstanceListSerializer(ReportInstanceSerializer):
+    """Paginated list ke liye slim version: page-wise extraction json nahi bhejta."""
+
+    class Meta(ReportInstanceSerializer.Meta):
+        fields = [name for name in ReportInstanceSerializer.Meta.fields if name != "json"]
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.UUIDField(source="id", read_only=True)
+    final_summary = serializers.CharField(source="instance.instance_summary", read_only=True, default=None)
+
+    class Meta:
+        model = ReportJob
+        fields = [
+            "job_id",
+            "report",
+            "instance",
+            "status",
+            "stage",
+            "stages",
+            "error",
+            "final_summary",
+            "created_at",
+            "updated_at",
+        ]
@@ -0,0 +1,36 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from authentication.models import User
+from .models import Report, ReportInstance
+from .list_cache import bump_list_version
+from .retrieval import forget_report_instance
+
+# ------------------------------
+# Report list version bumps (list_cache.py)
+# queryset.update() signals nahi bhejta, waha bump_list_version khud call karo.
+# ------------------------------
+
+
+@receiver([post_save, post_delete], sender=ReportInstance)
+def report_instance_changed(sender, instance, **kwargs):
+    user_id = Report.objects.filter(pk=instance.report_id).values_list("user_id", flat=True).first()
+    if user_id is not None:
+        bump_list_version(user_id)
+
+
+@receiver(post_delete, sender=ReportInstance)
+def report_instance_deleted(sender, instance, **kwargs):
+    # Deleted report ke chunks vector index se hatao, warna search ke top-k slots kha jate hain
+    forget_report_instance(instance.id)
+
+
+@receiver([post_save, post_delete], sender=Report)
+def report_changed(sender, instance, **kwargs):
+    # report_title list me dikhta hai
+    bump_list_version(instance.user_id)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    # Cached list bina DB ke serve hoti hai, deleted user ke purane token par na mile
+    bump_list_version(instance.id)
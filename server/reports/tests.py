@@ -1,3 +1,938 @@
-from django.test import TestCase
+import os
+import sqlite3
+import tempfile
+from datetime import timedelta
+from unittest import mock
+import jwt
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-# Create your tests here.
+from authentication.models import User
+from .models import ChatBot, ChatMessage, HealthProfile, Report, ReportInstance, ReportJob
+from . import jobs
+from .chat import compact_chat, lookup_cached_reply, MAX_HISTORY, CHAT_COMPACT_BATCH
+from .health import update_health_profile
+from . import recommendations
+from .retrieval import chunk_report_instance, retrieve_report_context, TESTS_PER_CHUNK
+
+from .agents.text_layer import parse_test_row, extract_from_text_layer
+from .agents.page_filter import BOILERPLATE, skip_reason
+from .agents import page_filter as page_filter_module
+from .cache import pipeline_version
+from .agents.page_rendering import RenderedPage
+from .agents import page_cache as page_cache_module
+from .agents.sqlite_store import MemoryStore
+from .agents.embeddings import HashingEmbedder, set_embedder
+from .agents import embeddings as embeddings_module
+from .agents import sqlite_store
+from .agents import semantic_cache as semantic_cache_module
+from .agents import vector_index as vector_index_module
+from .agents import youtube_scrapping
+from .agents import extracting_combined_details as combined_module
+from .agents import structured_output
+from .agents.extracting_json_details import TestResult
+
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests-default"},
+    "shared": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests-shared"},
+}
+
+
+def temp_sqlite_path(test):
+    """Har test ki apni agent cache file, test ke baad hat jati hai."""
+    directory = tempfile.TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+    return os.path.join(directory.name, "agent_cache.sqlite3")
+
+
+def words_for(lines):
+    """Fake fitz words: har line ek y par, words left se right."""
+    words = []
+    for line_no, line in enumerate(lines):
+        y = 20.0 * line_no
+        for word_no, text in enumerate(line.split()):
+            x = 60.0 * word_no
+            words.append((x, y, x + 50.0, y + 10.0, text, 0, line_no, word_no))
+    return words
+
+
+class ParseTestRowTests(SimpleTestCase):
+    def test_parses_common_rows(self):
+        cases = {
+            "Glucose (Blood Sugar), Fasting 193 mg/dl 70 - 110": ("Glucose (Blood Sugar), Fasting", 193.0, "70 - 110"),
+            "Total WBC 7,590 /cumm 4,000 - 11,000": ("Total WBC", 7590.0, "4,000 - 11,000"),
+            "HbA1C 8.80 %": ("HbA1C", 8.8, None),
+            "Glucose 193 H mg/dl 70-110": ("Glucose", 193.0, "70-110"),
+        }
+        for line, (name, found, test_range) in cases.items():
+            with self.subTest(line=line):
+                test = parse_test_row(line)
+                self.assertIsNotNone(test)
+                self.assertEqual((test.Name, test.Found, test.Range), (name, found, test_range))
+
+    def test_names_ending_in_digits(self):
+        cases = {
+            "Vitamin B12 250 pg/mL 200-900": ("Vitamin B12", 250.0, "200-900"),
+            "Free T4 1.2 ng/dL 0.8-1.8": ("Free T4", 1.2, "0.8-1.8"),
+            "CA 19-9 20 U/mL < 37": ("CA 19-9", 20.0, "< 37"),
+        }
+        for line, (name, found, test_range) in cases.items():
+            with self.subTest(line=line):
+                test = parse_test_row(line)
+                self.assertIsNotNone(test)
+                self.assertEqual((test.Name, test.Found, test.Range), (name, found, test_range))
+
+    def test_rejects_header_and_interpretation_lines(self):
+        for line in ["Age 45 Years", "AGE/SEX : 55 YEAR/MALE", "Page 1 of 3", "At risk (Pre-diabetes) 5.7-6.4"]:
+            with self.subTest(line=line):
+                self.assertIsNone(parse_test_row(line))
+
+
+class ExtractFromTextLayerTests(SimpleTestCase):
+    def test_fully_parsed_page(self):
+        lines = [
+            "Lifenity Health Limited",
+            "12th Floor, Trade World, Mumbai",
+            "Hemoglobin 13.5 g/dL 13 - 17",
+            "Vitamin B12 250 pg/mL 200-900",
+            "Free T4 1.2 ng/dL 0.8-1.8",
+            "Dr. Amrin Shaikh",
+            "End of Report",
+        ]
+        details, tests = extract_from_text_layer(words_for(lines))
+        self.assertEqual([t.Name for t in tests], ["Hemoglobin", "Vitamin B12", "Free T4"])
+        self.assertEqual(details.doctor_name, "Dr. Amrin Shaikh")
+        self.assertTrue(details.hospital_address.startswith("Lifenity Health Limited"))
+        self.assertTrue(details.end)
+        self.assertIsNone(details.disease_name)
+
+    def test_unparsed_result_line_sends_page_to_vision(self):
+        lines = [
+            "Complete Blood Count and Vitamin profile",
+            "Hemoglobin 13.5 g/dL 13 - 17",
+            "25 OH Vitamin D 18 ng/mL 30 - 100",
+        ]
+        self.assertIsNone(extract_from_text_layer(words_for(lines)))
+
+    def test_interpretation_table_does_not_block_text_path(self):
+        lines = [
+            "HbA1C - Glycated Haemoglobin 8.80 %",
+            "Non-diabetic adults>=18 years <5.7",
+            "At risk (Pre-diabetes) 5.7-6.4",
+            "Goal of therapy:< 7.5",
+        ]
+        _, tests = extract_from_text_layer(words_for(lines))
+        self.assertEqual([(t.Name, t.Found) for t in tests], [("HbA1C - Glycated Haemoglobin", 8.8)])
+
+    def test_page_without_text_layer(self):
+        self.assertIsNone(extract_from_text_layer([]))
+
+
+class PageFilterTests(SimpleTestCase):
+    def page_with(self, lines):
+        return RenderedPage(page_number=1, image_bytes=b"", words=words_for(lines), ink_ratio=0.03, image_coverage=0.1)
+
+    def test_disclaimer_page_is_skipped(self):
+        lines = [
+            "DISCLAIMER",
+            "This report is for the use of the referring doctor only and is not valid for medico legal purposes.",
+            "Results relate only to the sample received and should be correlated clinically by the physician.",
+            "Partial reproduction of this report is not permitted without written approval of the laboratory.",
+            "Authorised Signatory",
+        ]
+        self.assertEqual(skip_reason(self.page_with(lines)), BOILERPLATE)
+
+    def test_qualitative_result_page_with_signatory_footer_is_kept(self):
+        lines = [
+            "Patient Name: Mr. Khalil Sayyed",
+            "Dr. Amrin Shaikh",
+            "BLOOD GROUPING",
+            "ABO Group B",
+            "Rh Type Positive",
+            "HIV I & II Antibody Non Reactive",
+            "Authorised Signatory",
+        ]
+        self.assertIsNone(skip_reason(self.page_with(lines)))
+
+    def test_short_label_page_with_footer_is_kept(self):
+        lines = [
+            "Patient Name: Mr. Khalil Sayyed",
+            "Referred By: Dr. Amrin Shaikh",
+            "Clinical History: Type 2 Diabetes Mellitus",
+            "Specimen: Whole blood",
+            "Authorised Signatory",
+        ]
+        self.assertIsNone(skip_reason(self.page_with(lines)))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReportJobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="jobs@example.com", password="x", name="Jobs")
+        self.report = Report.objects.create(user=self.user, title="Blood test")
+        jobs.caches["shared"].clear()
+
+    def make_job(self, status="queued", minutes_ago=0):
+        job = ReportJob.objects.create(
+            user=self.user, report=self.report, file_name="report.pdf",
+            file_path="temp/missing-report.pdf", status=status,
+        )
+        ReportJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(minutes=minutes_ago))
+        return job
+
+    def run_job(self, job):
+        instance = ReportInstance.objects.create(report=self.report)
+        with mock.patch.object(jobs, "run_report_pipeline", return_value={"instance": instance, "youtube_query": "q"}) as pipeline, \
+                mock.patch.object(jobs, "schedule_youtube_videos"):
+            jobs.run_report_job(job.id)
+        return pipeline
+
+    def test_queued_job_runs_once(self):
+        job = self.make_job()
+        self.assertEqual(self.run_job(job).call_count, 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "completed")
+        self.assertIsNotNone(job.instance_id)
+
+        # Recovery ke baad same job dobara queue me aaye to bhi no-op
+        self.assertEqual(self.run_job(job).call_count, 0)
+
+    def test_job_claimed_by_another_worker_is_skipped(self):
+        job = self.make_job(status="running")
+        self.assertEqual(self.run_job(job).call_count, 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "running")
+
+    def test_recovery_fails_only_stale_running_jobs(self):
+        stale = self.make_job(status="running", minutes_ago=jobs.REPORT_JOB_STALE_MINUTES + 1)
+        fresh = self.make_job(status="running")
+        with mock.patch.object(jobs, "enqueue_report_job"):
+            jobs.recover_report_jobs()
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual(stale.status, "failed")
+        self.assertEqual(fresh.status, "running")
+
+    def test_recovery_requeues_old_queued_jobs_once(self):
+        old = self.make_job(minutes_ago=jobs.REPORT_JOB_REQUEUE_MINUTES + 1)
+        self.make_job()
+        with mock.patch.object(jobs, "enqueue_report_job") as enqueue:
+            jobs.recover_report_jobs()
+            self.assertEqual([call.args[0].pk for call in enqueue.call_args_list], [old.pk])
+
+            # Sweep throttled hai; throttle hata kar bhi touched job dobara enqueue nahi hota
+            jobs.recover_report_jobs()
+            self.assertEqual(enqueue.call_count, 1)
+            jobs.caches["shared"].clear()
+            jobs.recover_report_jobs()
+            self.assertEqual(enqueue.call_count, 1)
+
+    def test_startup_recovery_fails_running_and_enqueues_nothing(self):
+        running = self.make_job(status="running")
+        queued = self.make_job(minutes_ago=60)
+        with mock.patch.object(jobs, "enqueue_report_job") as enqueue:
+            self.assertEqual(jobs.fail_interrupted_report_jobs(), 1)
+        enqueue.assert_not_called()
+        running.refresh_from_db()
+        queued.refresh_from_db()
+        self.assertEqual(running.status, "failed")
+        self.assertEqual(queued.status, "queued")
+
+
+class CachedPageExtractionTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(page_cache_module, "page_cache", page_cache_module.PageCache(MemoryStore()))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.page = RenderedPage(page_number=1, image_bytes=b"page", words=[], ink_ratio=0.03, image_coverage=0.1)
+
+    def extractor(self, result, fail=False):
+        calls = []
+
+        @page_cache_module.cached_page_extraction("tests:test", dump=list, load=list)
+        def extract(page):
+            calls.append(page.page_number)
+            page.failed = page.failed or fail
+            return result
+        return extract, calls
+
+    def test_empty_result_is_cached(self):
+        extract, calls = self.extractor([])
+        self.assertEqual(extract(self.page), [])
+        self.assertEqual(extract(self.page), [])
+        self.assertEqual(len(calls), 1)
+
+    def test_failed_result_is_not_cached(self):
+        extract, calls = self.extractor([], fail=True)
+        extract(self.page)
+        self.page.failed = False
+        extract(self.page)
+        self.assertEqual(len(calls), 2)
+
+    def test_earlier_failure_does_not_block_caching(self):
+        # Details pass fail hua, tests pass theek chala: tests cache hone chahiye, page failed hi rahe
+        self.page.failed = True
+        extract, calls = self.extractor(["Hemoglobin"])
+        extract(self.page)
+        extract(self.page)
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(self.page.failed)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class HealthProfileUpdateTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="profile@example.com", password="x", name="Profile")
+        report = Report.objects.create(user=self.user, title="Blood test")
+        self.first = ReportInstance.objects.create(report=report, instance_summary="High sugar.")
+        self.second = ReportInstance.objects.create(report=report, instance_summary="Low vitamin D.")
+
+    def test_folds_new_instances(self):
+        with mock.patch("reports.agents.health_profile.update_health_profile_text", return_value="sugar, vitamin D") as merge:
+            profile = update_health_profile(self.user.id)
+        merge.assert_called_once_with("", ["High sugar.", "Low vitamin D."])
+        profile.refresh_from_db()
+        self.assertEqual((profile.summary, profile.instance_count, profile.last_instance_pk), ("sugar, vitamin D", 2, self.second.pk))
+
+    def test_concurrent_update_is_not_overwritten(self):
+        def merge(profile, summaries):
+            if not profile:
+                # LLM call ke beech doosre worker ne pehla instance fold kar diya
+                HealthProfile.objects.filter(user=self.user).update(summary="sugar", instance_count=1, last_instance_pk=self.first.pk)
+            return f"{profile} + {len(summaries)}"
+
+        with mock.patch("reports.agents.health_profile.update_health_profile_text", side_effect=merge):
+            update_health_profile(self.user.id)
+        profile = HealthProfile.objects.get(user=self.user)
+        self.assertEqual((profile.summary, profile.instance_count, profile.last_instance_pk), ("sugar + 1", 2, self.second.pk))
+
+
+class CompactChatTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="chat@example.com", password="x", name="Chat")
+        start = timezone.now() - timedelta(hours=1)
+        ChatMessage.objects.bulk_create([
+            ChatMessage(user=self.user, role="human" if i % 2 == 0 else "ai", content=f"message {i}", created_at=start + timedelta(seconds=i))
+            for i in range(MAX_HISTORY + CHAT_COMPACT_BATCH)
+        ])
+        self.older = list(ChatMessage.objects.filter(user=self.user).order_by("created_at")[:CHAT_COMPACT_BATCH])
+
+    def test_folds_turns_outside_the_window(self):
+        with mock.patch("reports.agents.chat_memory.compact_chat_history", return_value="memory") as summarize:
+            self.assertTrue(compact_chat(self.user.id))
+        self.assertEqual(len(summarize.call_args.args[1]), CHAT_COMPACT_BATCH)
+        chatbot = ChatBot.objects.get(user=self.user)
+        self.assertEqual((chatbot.summary, chatbot.summarized_until), ("memory", self.older[-1].id))
+
+        # Batch poora ho chuka, ab kuch nahi karna
+        self.assertFalse(compact_chat(self.user.id))
+
+    def test_concurrent_compaction_wins(self):
+        def summarize(summary, messages):
+            ChatBot.objects.filter(user=self.user).update(summary="other", summarized_until=self.older[-1].id)
+            return "stale"
+
+        with mock.patch("reports.agents.chat_memory.compact_chat_history", side_effect=summarize):
+            self.assertFalse(compact_chat(self.user.id))
+        self.assertEqual(ChatBot.objects.get(user=self.user).summary, "other")
+
+
+class SemanticCacheTests(SimpleTestCase):
+    profile = "Type 2 diabetes, HbA1c 8.8"
+
+    def make_cache(self, **kwargs):
+        return semantic_cache_module.SemanticCache(embedder=HashingEmbedder(), path=temp_sqlite_path(self), threshold=0.9, **kwargs)
+
+    def check_threshold(self):
+        cache = self.make_cache()
+        cache.store("What should I eat for high sugar?", self.profile, "Eat more fibre.")
+
+        self.assertEqual(cache.lookup("what should i eat for HIGH sugar", self.profile)[0], "Eat more fibre.")
+        self.assertIsNone(cache.lookup("How can I lower my cholesterol?", self.profile)[0])
+        self.assertIsNone(cache.lookup("What should I eat for high sugar?", "Healthy, no conditions")[0])
+        self.assertEqual((cache.stats()["hits"], cache.stats()["misses"]), (1, 2))
+
+    def test_threshold_with_sqlite_vec(self):
+        if not vector_index_module.load_sqlite_vec(sqlite3.connect(":memory:")):
+            self.skipTest("sqlite-vec extension cannot be loaded in this Python build")
+        self.check_threshold()
+
+    def test_threshold_without_sqlite_vec(self):
+        with mock.patch.object(vector_index_module, "load_sqlite_vec", return_value=False):
+            self.check_threshold()
+
+    def test_expired_entries_miss_and_are_evicted(self):
+        cache = self.make_cache(ttl_seconds=60)
+        cache.store("Is 193 mg/dl fasting sugar high?", self.profile, "Yes.")
+        conn = cache._connect()
+        conn.execute(f"UPDATE {cache.table} SET created_at = created_at - 120")
+        conn.commit()
+
+        self.assertIsNone(cache.lookup("Is 193 mg/dl fasting sugar high?", self.profile)[0])
+        cache.evict()
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_eviction_keeps_most_recently_used(self):
+        cache = self.make_cache(max_entries=1)
+        cache.store("first question", self.profile, "first")
+        cache.store("second question", self.profile, "second")
+        cache.evict()
+        self.assertEqual(cache.stats()["entries"], 1)
+        self.assertEqual(cache.lookup("second question", self.profile)[0], "second")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SemanticCacheStandaloneGateTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="gate@example.com", password="x", name="Gate")
+        self.cache = mock.Mock()
+        self.cache.lookup.return_value = ("cached", [1.0])
+        for patcher in (
+            mock.patch.object(semantic_cache_module, "CHAT_SEMANTIC_CACHE_ENABLED", True),
+            mock.patch.object(semantic_cache_module, "get_semantic_cache", return_value=self.cache),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_recent_conversation_skips_cache(self):
+        ChatMessage.objects.create(user=self.user, role="human", content="My sugar is 193")
+        self.assertEqual(lookup_cached_reply(self.user, "tell me more", "profile"), (None, None))
+        self.cache.lookup.assert_not_called()
+
+    def test_standalone_question_uses_cache(self):
+        ChatMessage.objects.create(user=self.user, role="human", content="hi", created_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(lookup_cached_reply(self.user, "What should I eat for high sugar?", "profile"), ("cached", [1.0]))
+
+    def test_empty_context_skips_cache(self):
+        self.assertEqual(lookup_cached_reply(self.user, "What should I eat for high sugar?", "", ""), (None, None))
+        self.cache.lookup.assert_not_called()
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ChatSemanticCacheIsolationTests(TestCase):
+    url = "/api/reports/chatbot/"
+    question = "What should I eat for high sugar?"
+
+    def setUp(self):
+        cache = semantic_cache_module.SemanticCache(embedder=HashingEmbedder(), path=temp_sqlite_path(self), threshold=0.9)
+        self.llm = mock.Mock()
+        self.llm.invoke.side_effect = lambda messages: mock.Mock(content=f"reply {self.llm.invoke.call_count}")
+        self.excerpts = {}
+        for patcher in (
+            mock.patch.object(semantic_cache_module, "CHAT_SEMANTIC_CACHE_ENABLED", True),
+            mock.patch.object(semantic_cache_module, "get_semantic_cache", return_value=cache),
+            mock.patch("reports.views.get_chat", return_value=self.llm),
+            mock.patch("reports.chat.retrieve_report_context", side_effect=lambda user, question: self.excerpts.get(user.id, [])),
+            mock.patch("reports.chat.schedule_chat_compaction"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def make_user(self, email, profile, history):
+        user = User.objects.create_user(email=email, password="x", name=email)
+        HealthProfile.objects.create(user=user, summary=profile)
+        ChatMessage.objects.create(user=user, role="human", content=history, created_at=timezone.now() - timedelta(days=2))
+        return user
+
+    def ask(self, user):
+        token = jwt.encode({"id": user.id}, "secret", algorithm="HS256")
+        return self.client.post(self.url, {"message": self.question}, HTTP_AUTHORIZATION=token).json()
+
+    def test_shared_profile_shares_reply_without_leaking_history(self):
+        first = self.make_user("first@example.com", "Type 2 diabetes", "My HIV test came back positive")
+        second = self.make_user("second@example.com", "Type 2 diabetes", "I am pregnant")
+
+        self.assertEqual(self.ask(first), {"response": "reply 1", "cached": False})
+        prompt = " ".join(message.content for message in self.llm.invoke.call_args.args[0])
+        self.assertNotIn("HIV", prompt)
+        self.assertIn("Type 2 diabetes", prompt)
+
+        self.assertEqual(self.ask(second), {"response": "reply 1", "cached": True})
+        self.assertEqual(self.llm.invoke.call_count, 1)
+
+    def test_different_report_excerpts_do_not_share_replies(self):
+        first = self.make_user("first@example.com", "Type 2 diabetes", "hello")
+        second = self.make_user("second@example.com", "Type 2 diabetes", "hello")
+        self.excerpts[first.id] = ["Report 'Sugar' dated 1 March 2025 test results:\nGlucose: 193"]
+
+        self.ask(first)
+        self.assertEqual(self.ask(second), {"response": "reply 2", "cached": False})
+
+    def test_users_without_context_are_not_cached(self):
+        first = self.make_user("first@example.com", "", "hello")
+        second = self.make_user("second@example.com", "", "hello")
+        self.ask(first)
+        self.assertEqual(self.ask(second)["cached"], False)
+        self.assertEqual(self.llm.invoke.call_count, 2)
+
+
+def youtube_item(video_id):
+    return {
+        "id": {"videoId": video_id},
+        "snippet": {
+            "title": f"Video {video_id}", "channelTitle": "Channel", "channelId": "c1",
+            "publishedAt": "2025-01-01T00:00:00Z", "thumbnails": {},
+        },
+    }
+
+
+class FakeYouTubeRequest:
+    def __init__(self, client, query):
+        self.client, self.query = client, query
+
+    def execute(self):
+        self.client.executed.append(self.query)
+        if self.query in self.client.failing:
+            raise RuntimeError("quota exceeded")
+        return {"items": [youtube_item(self.query.split()[0])]}
+
+
+class FakeYouTubeBatch:
+    def __init__(self, client):
+        self.client, self.requests = client, []
+
+    def add(self, request, callback, request_id):
+        self.requests.append((request, callback, request_id))
+
+    def execute(self):
+        self.client.batches += 1
+        for request, callback, request_id in self.requests:
+            try:
+                callback(request_id, request.execute(), None)
+            except Exception as e:
+                callback(request_id, None, e)
+
+
+class FakeYouTubeClient:
+    def __init__(self, failing=()):
+        self.executed, self.batches, self.failing = [], 0, set(failing)
+
+    def search(self):
+        return self
+
+    def list(self, part, q, type, maxResults):
+        return FakeYouTubeRequest(self, q)
+
+    def new_batch_http_request(self):
+        return FakeYouTubeBatch(self)
+
+
+class YouTubeSearchTests(SimpleTestCase):
+    def setUp(self):
+        self.client = FakeYouTubeClient(failing={"broken query"})
+        youtube_scrapping.set_client(self.client)
+        self.addCleanup(youtube_scrapping.set_client, None)
+        self.cache = MemoryStore()
+        self.addCleanup(youtube_scrapping.set_cache, youtube_scrapping._cache)
+        youtube_scrapping.set_cache(self.cache)
+
+    def test_normalize_query_collisions(self):
+        normalize = youtube_scrapping.normalize_query
+        self.assertEqual(normalize("Yoga for Anemia!"), normalize("anemia  yoga for"))
+        self.assertEqual(normalize("Diet, diet for diabetes"), normalize("diabetes diet for"))
+        self.assertNotEqual(normalize("yoga for anemia"), normalize("yoga for diabetes"))
+
+    def test_search_cache_miss_then_hit(self):
+        first = youtube_scrapping.youtube_search("anemia yoga", max_results=3)
+        second = youtube_scrapping.youtube_search("Yoga, Anemia", max_results=3)
+        self.assertEqual(first, second)
+        self.assertEqual(self.client.executed, ["anemia yoga"])
+
+        # max_results key ka hissa hai
+        youtube_scrapping.youtube_search("anemia yoga", max_results=5)
+        self.assertEqual(len(self.client.executed), 2)
+
+    def test_search_many_batches_misses_and_skips_failures(self):
+        youtube_scrapping.youtube_search("anemia yoga")
+        results = youtube_scrapping.youtube_search_many(["anemia yoga", "diabetes diet", "broken query", "diabetes diet"])
+
+        self.assertEqual(self.client.batches, 1)
+        self.assertEqual(self.client.executed, ["anemia yoga", "diabetes diet", "broken query"])
+        self.assertEqual(results["anemia yoga"][0]["video_id"], "anemia")
+        self.assertEqual(results["diabetes diet"][0]["video_id"], "diabetes")
+        self.assertEqual(results["broken query"], [])
+
+        # Failed query cache nahi hoti, agli baar dobara try hoti hai
+        youtube_scrapping.youtube_search_many(["diabetes diet", "broken query"])
+        self.assertEqual(self.client.executed[-1], "broken query")
+        self.assertEqual(self.client.executed.count("diabetes diet"), 1)
+
+
+def blood_test_json(*tests):
+    return {"test_details": [{"page_number": 1, "tests": [{"Name": name, "Found": found, "Range": test_range} for name, found, test_range in tests]}]}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReportRetrievalTests(TestCase):
+    def setUp(self):
+        # Offline: hashing embedder + har test ki apni sqlite file
+        self.addCleanup(set_embedder, embeddings_module._embedder)
+        set_embedder(HashingEmbedder())
+        for patcher in (
+            mock.patch.object(sqlite_store, "AGENT_CACHE_PATH", temp_sqlite_path(self)),
+            mock.patch.object(vector_index_module, "_index", None),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create_user(email="rag@example.com", password="x", name="Rag")
+        self.other = User.objects.create_user(email="other@example.com", password="x", name="Other")
+        report = Report.objects.create(user=self.user, title="Blood test")
+        self.sugar = ReportInstance.objects.create(
+            report=report, name_of_the_doctor="Dr. Amrin Shaikh",
+            instance_summary="Fasting glucose is high. HbA1c shows poor diabetes control.",
+            json=blood_test_json(("Glucose Fasting", 193, "70 - 110"), ("HbA1C", 8.8, None)),
+        )
+        self.blood = ReportInstance.objects.create(
+            report=report, instance_summary="Blood count is normal.",
+            json=blood_test_json(("Hemoglobin", 13.5, "13 - 17"), ("Total WBC", 7590, "4000 - 11000")),
+        )
+        other_report = Report.objects.create(user=self.other, title="Blood test")
+        self.other_instance = ReportInstance.objects.create(
+            report=other_report, instance_summary="Hemoglobin is low.",
+            json=blood_test_json(("Hemoglobin", 9.1, "13 - 17")),
+        )
+        self.index = vector_index_module.get_index()
+        for instance in (self.sugar, self.blood, self.other_instance):
+            self.index.add(instance.report.user_id, instance.id, chunk_report_instance(instance))
+
+    def test_chunks_carry_report_label_and_tests(self):
+        chunks = chunk_report_instance(self.sugar)
+        self.assertEqual(len(chunks), 2)
+        self.assertTrue(all(chunk.startswith("Report 'Blood test' dated ") for chunk in chunks))
+        self.assertIn("(Dr. Amrin Shaikh) summary: Fasting glucose is high.", chunks[0])
+        self.assertIn("Glucose Fasting: 193 (normal range 70 - 110)\nHbA1C: 8.8", chunks[1])
+
+        many = ReportInstance(report=self.sugar.report, json=blood_test_json(*[(f"Test {i}", i, None) for i in range(TESTS_PER_CHUNK + 1)]))
+        self.assertEqual(len(chunk_report_instance(many)), 2)
+
+    def test_search_returns_users_best_chunk(self):
+        text, instance_id, _ = self.index.search(self.user.id, "hemoglobin and total wbc", k=1)[0]
+        self.assertEqual(instance_id, self.blood.id)
+        self.assertIn("Hemoglobin: 13.5", text)
+
+        # Dobara index karne par chunks replace hote hain, duplicate nahi
+        self.index.add(self.user.id, self.blood.id, chunk_report_instance(self.blood))
+        self.assertEqual(len(self.index.search(self.user.id, "hemoglobin", k=10)), 4)
+
+    def test_retrieval_never_returns_other_users_chunks(self):
+        excerpts = retrieve_report_context(self.user, "hemoglobin", k=10)
+        self.assertEqual(len(excerpts), 4)
+        self.assertNotIn("9.1", " ".join(excerpts))
+        self.assertEqual(retrieve_report_context(self.other, "hemoglobin", k=10), chunk_report_instance(self.other_instance))
+
+    def test_deleted_instance_is_removed_from_index(self):
+        self.blood.delete()
+        self.assertEqual(self.index.indexed_instances(self.user.id), {self.sugar.id})
+        self.assertTrue(all("Hemoglobin" not in text for text in retrieve_report_context(self.user, "hemoglobin", k=1)))
+
+    def test_stale_chunks_are_dropped_before_search(self):
+        # Signal ke bina gaya instance (purana index): uske chunks top-k slot na le
+        self.index.add(self.user.id, 999999, ["Hemoglobin: 13.5 hemoglobin hemoglobin"])
+        self.assertIn("Hemoglobin: 13.5", retrieve_report_context(self.user, "hemoglobin", k=1)[0])
+        self.assertNotIn(999999, self.index.indexed_instances(self.user.id))
+
+    def test_unindexed_instances_are_scheduled(self):
+        self.index.delete_instances([self.sugar.id])
+        with mock.patch("reports.retrieval.schedule_report_indexing") as schedule:
+            retrieve_report_context(self.user, "sugar")
+        schedule.assert_called_once_with(self.sugar.id)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReportListCachingTests(TestCase):
+    url = "/api/reports/get_user_instances/"
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="list@example.com", password="x", name="List")
+        self.report = Report.objects.create(user=self.user, title="Blood test")
+        self.instance = ReportInstance.objects.create(report=self.report, instance_summary="Sugar is high.")
+        self.auth = {"HTTP_AUTHORIZATION": jwt.encode({"id": self.user.id}, "secret", algorithm="HS256")}
+        for patcher in (
+            mock.patch("reports.views.schedule_missing_youtube_videos"),
+            mock.patch("reports.signals.forget_report_instance"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get(self, query="", **headers):
+        return self.client.get(self.url + query, **self.auth, **headers)
+
+    def instance_ids(self, response):
+        return [item["id"] for item in response.json()["report_instances"]]
+
+    def test_etag_and_headers(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response["ETag"], rf'^"{self.user.id}-\d+-[0-9a-f]{{12}}"$')
+        self.assertIn("Last-Modified", response)
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        self.assertEqual(self.instance_ids(response), [self.instance.id])
+
+        # Alag query params = alag variant = alag ETag
+        self.assertNotEqual(self.get("?fields=id")["ETag"], response["ETag"])
+
+    def test_matching_if_none_match_returns_304(self):
+        etag = self.get()["ETag"]
+        with self.assertNumQueries(0):
+            response = self.get(HTTP_IF_NONE_MATCH=f'"stale", {etag}')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_cached_body_is_served_without_queries(self):
+        first = self.get()
+        with self.assertNumQueries(0):
+            second = self.get()
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+
+    def test_create_and_delete_bump_the_version(self):
+        etag = self.get()["ETag"]
+        added = ReportInstance.objects.create(report=self.report, instance_summary="Vitamin D is low.")
+
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(sorted(self.instance_ids(response)), sorted([self.instance.id, added.id]))
+
+        etag = response["ETag"]
+        added.delete()
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.instance_ids(response), [self.instance.id])
+
+    def test_only_latest_body_is_kept_per_variant(self):
+        from django.core.cache import caches
+        caches["shared"].clear()
+        self.get()
+        ReportInstance.objects.create(report=self.report, instance_summary="Vitamin D is low.")
+        self.get()
+        body_keys = [key for key in caches["shared"]._cache if "report_list_body" in key]
+        self.assertEqual(len(body_keys), 1)
+
+    def test_report_rename_bumps_the_version(self):
+        etag = self.get()["ETag"]
+        self.report.title = "Diabetes panel"
+        self.report.save()
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["report_instances"][0]["report_title"], "Diabetes panel")
+
+
+class CombinedExtractionTests(SimpleTestCase):
+    response = {
+        "details": {"doctor_name": "Dr. Amrin Shaikh", "end": False},
+        "tests": [
+            {"Name": "Hemoglobin", "Found": 13.5, "Range": "13 - 17"},
+            {"Name": "Blood Group", "Found": "B positive"},
+            {"Name": "Total WBC", "Found": 7590},
+        ],
+    }
+
+    def test_bad_row_drops_only_that_row(self):
+        combined = combined_module.parse_combined_response(self.response)
+        self.assertEqual([t.Name for t in combined.tests], ["Hemoglobin", "Total WBC"])
+        self.assertEqual(combined.details.doctor_name, "Dr. Amrin Shaikh")
+        self.assertEqual(combined._dropped_tests, 1)
+
+    def test_page_with_dropped_rows_is_failed_and_not_cached(self):
+        store = MemoryStore()
+        page = RenderedPage(page_number=1, image_bytes=b"page", words=[], ink_ratio=0.03, image_coverage=0.1)
+        with mock.patch.object(page_cache_module, "page_cache", page_cache_module.PageCache(store)), \
+                mock.patch.object(combined_module, "get_genai_client"), \
+                mock.patch.object(combined_module, "with_backoff"), \
+                mock.patch.object(combined_module, "generate_json", side_effect=lambda *args, parse, **kwargs: parse(self.response)):
+            combined = combined_module.extract_combined_from_page(page)
+
+        self.assertEqual(len(combined.tests), 2)
+        self.assertTrue(page.failed)
+        self.assertEqual(store.data, {})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class YouTubeRecommendationTests(TestCase):
+    def setUp(self):
+        recommendations._cache().clear()
+        user = User.objects.create_user(email="videos@example.com", password="x", name="Videos")
+        report = Report.objects.create(user=user, title="Blood test")
+        self.instance = ReportInstance.objects.create(report=report, instance_summary="Low hemoglobin.", json={"test_details": []})
+        self.query = mock.patch("reports.agents.yoga_prompt.get_youtube_query", return_value="yoga for anemia")
+        self.get_query = self.query.start()
+        self.addCleanup(self.query.stop)
+        # Light pool ki jagah turant chalao
+        patcher = mock.patch.object(recommendations, "submit_light", side_effect=lambda fn, *args: fn(*args))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_query_is_saved_before_search(self):
+        with mock.patch.object(recommendations, "fetch_youtube_videos", side_effect=RuntimeError("quota exceeded")):
+            recommendations.schedule_youtube_videos(self.instance.id)
+        self.instance.refresh_from_db()
+        self.assertEqual(self.instance.json["youtube_query"], "yoga for anemia")
+        self.assertEqual(self.instance.json["test_details"], [])
+        self.assertIsNone(self.instance.youtube_videos)
+
+        # Retry par GPT call nahi, saved query use hoti hai
+        with mock.patch.object(recommendations, "fetch_youtube_videos", return_value=[{"video_id": "v1"}]) as fetch:
+            recommendations.fill_youtube_videos(self.instance.id)
+        fetch.assert_called_once_with("yoga for anemia")
+        self.assertEqual(self.get_query.call_count, 1)
+
+    def test_failed_fill_is_not_rescheduled_on_reads(self):
+        with mock.patch.object(recommendations, "fetch_youtube_videos", side_effect=RuntimeError("quota exceeded")) as fetch:
+            recommendations.schedule_missing_youtube_videos([self.instance])
+            self.instance.refresh_from_db()
+            recommendations.schedule_missing_youtube_videos([self.instance])
+        self.assertEqual(fetch.call_count, 1)
+
+        recommendations._cache().delete(f"youtube_failed:{self.instance.id}")
+        with mock.patch.object(recommendations, "fetch_youtube_videos", return_value=[]) as fetch:
+            recommendations.schedule_missing_youtube_videos([self.instance])
+        fetch.assert_called_once()
+
+    def test_pending_fill_is_deduplicated_in_the_shared_cache(self):
+        recommendations._cache().add(f"youtube_pending:{self.instance.id}", True)
+        with mock.patch.object(recommendations, "fetch_youtube_videos") as fetch:
+            recommendations.schedule_youtube_videos(self.instance.id)
+        fetch.assert_not_called()
+
+
+class PipelineVersionTests(SimpleTestCase):
+    def test_page_filter_settings_change_the_version(self):
+        version = pipeline_version("combined", "fast")
+        for setting in ("PAGE_BLANK_INK_RATIO", "PAGE_MAX_IMAGE_COVERAGE", "PAGE_BOILERPLATE_MIN_SHARE"):
+            with self.subTest(setting=setting), mock.patch.object(page_filter_module, setting, 0.123):
+                self.assertNotEqual(pipeline_version("combined", "fast"), version)
+
+
+class TextLayerDetailsTests(SimpleTestCase):
+    lines = ["Lifenity Health Limited", "Dr. Amrin Shaikh", "Hemoglobin 13.5 g/dL 13 - 17"]
+
+    def extract(self, vision_details):
+        page = RenderedPage(page_number=1, image_bytes=b"", words=words_for(self.lines), ink_ratio=0.03, image_coverage=0.1)
+        with mock.patch.object(combined_module, "extract_report_details_from_page", return_value=vision_details) as vision:
+            reports, results, remaining = combined_module.extract_text_layer_pages([page])
+        return vision, reports, results, remaining
+
+    def test_details_come_from_vision_and_tests_from_text(self):
+        details = combined_module.ReportDetails(disease_name="Anemia", doctor_name="Dr. Amrin Shaikh", questions=["Repeat CBC?"])
+        vision, reports, results, remaining = self.extract(details)
+        vision.assert_called_once()
+        self.assertEqual((reports[0].details.disease_name, reports[0].details.questions), ("Anemia", ["Repeat CBC?"]))
+        self.assertEqual([t.Name for t in results[0].tests], ["Hemoglobin"])
+        self.assertEqual(remaining, [])
+
+    def test_text_details_are_used_when_vision_fails(self):
+        _, reports, _, _ = self.extract(None)
+        self.assertEqual(reports[0].details.doctor_name, "Dr. Amrin Shaikh")
+        self.assertIsNone(reports[0].details.disease_name)
+
+    def test_vision_details_can_be_turned_off(self):
+        with mock.patch.object(combined_module, "TEXT_LAYER_VISION_DETAILS", False):
+            vision, reports, _, _ = self.extract(None)
+        vision.assert_not_called()
+        self.assertEqual(reports[0].details.doctor_name, "Dr. Amrin Shaikh")
+
+
+class GenerateJsonTests(SimpleTestCase):
+    contents = ["prompt", "page image"]
+
+    def setUp(self):
+        self.stats = structured_output.ParseStats()
+        patcher = mock.patch.object(structured_output, "parse_stats", self.stats)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def generate(self, *replies):
+        client = mock.Mock()
+        client.models.generate_content.side_effect = [mock.Mock(text=reply) for reply in replies]
+        result = structured_output.generate_json(client, "gemini", self.contents, list[TestResult], kind="tests")
+        return result, client.models.generate_content.call_args_list
+
+    def test_valid_first_reply(self):
+        result, calls = self.generate('[{"Name": "Hemoglobin", "Found": 13.5}]')
+        self.assertEqual([t.Name for t in result], ["Hemoglobin"])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(calls[0].kwargs["config"]["response_schema"], list[TestResult])
+        self.assertEqual(self.stats.stats()["tests"], {"ok": 1, "repaired": 0, "failed": 0, "failure_rate": 0.0})
+
+    def test_invalid_then_repaired(self):
+        result, calls = self.generate('[{"Name": "Hemoglobin", "Found": "high"}]', '[{"Name": "Hemoglobin", "Found": 13.5}]')
+        self.assertEqual(result[0].Found, 13.5)
+        self.assertEqual(len(calls), 2)
+        # Repair call me image dobara nahi, sirf purana reply + error
+        repair = calls[1].kwargs["contents"]
+        self.assertEqual(len(repair), 1)
+        self.assertIn('"Found": "high"', repair[0])
+        self.assertNotIn("page image", repair)
+        self.assertEqual(self.stats.stats()["tests"], {"ok": 0, "repaired": 1, "failed": 0, "failure_rate": 0.0})
+
+    def test_invalid_twice_fails(self):
+        result, calls = self.generate("not json", "still not json")
+        self.assertIsNone(result)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(self.stats.stats()["tests"], {"ok": 0, "repaired": 0, "failed": 1, "failure_rate": 1.0})
+
+    def test_empty_reply_retries_the_original_request(self):
+        result, calls = self.generate("", '[{"Name": "Hemoglobin", "Found": 13.5}]')
+        self.assertEqual(len(result), 1)
+        self.assertEqual(calls[1].kwargs["contents"], self.contents)
+        self.assertEqual(self.stats.stats()["tests"]["repaired"], 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReportListPaginationTests(TestCase):
+    url = "/api/reports/get_user_instances/"
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="pages@example.com", password="x", name="Pages")
+        self.report = Report.objects.create(user=self.user, title="Blood test")
+        self.instances = [
+            ReportInstance.objects.create(report=self.report, instance_summary=f"Report {i}", json={"test_details": []})
+            for i in range(5)
+        ]
+        self.auth = {"HTTP_AUTHORIZATION": jwt.encode({"id": self.user.id}, "secret", algorithm="HS256")}
+        patcher = mock.patch("reports.views.schedule_missing_youtube_videos")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self, url):
+        return self.client.get(url, **self.auth)
+
+    def test_cursor_pages_are_stable_when_new_reports_arrive(self):
+        expected = [instance.id for instance in reversed(self.instances)]
+        seen, url = [], self.url + "?page_size=2"
+        while url:
+            data = self.get(url).json()
+            seen += [item["id"] for item in data["report_instances"]]
+            if len(seen) == 2:
+                # Beech me nayi report aaye to bhi aage ke pages shift nahi hote
+                ReportInstance.objects.create(report=self.report, instance_summary="New report")
+            url = data["next"]
+        self.assertEqual(seen, expected)
+
+    def test_slim_list_defers_json(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get(self.url + "?page_size=10").json()
+        self.assertNotIn("json", data["report_instances"][0])
+        self.assertIn("instance_summary", data["report_instances"][0])
+        instance_queries = [q["sql"] for q in queries if "reports_reportinstance" in q["sql"]]
+        self.assertTrue(instance_queries)
+        self.assertTrue(all('"reports_reportinstance"."json"' not in sql for sql in instance_queries))
+
+    def test_fields_selects_columns_and_json_on_request(self):
+        data = self.get(self.url + "?page_size=10&fields=id,json").json()
+        self.assertEqual(set(data["report_instances"][0]), {"id", "json"})
+        data = self.get(self.url + f"?pk={self.instances[0].id}&fields=id,report_title").json()
+        self.assertEqual(data["report_instance"], {"id": self.instances[0].id, "report_title": "Blood test"})
+
+    def test_unknown_fields_are_rejected(self):
+        for query in ("?fields=id,password", "?page_size=2&fields=secret", f"?pk={self.instances[0].id}&fields=nope"):
+            with self.subTest(query=query):
+                response = self.get(self.url + query)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("Unknown fields", response.json()["error"])
@@ -0,0 +1,26 @@
+import os
+from django.core.files.storage import default_storage
+
+# ------------------------------
+# Uploaded report PDFs
+# Chhoti files seedha memory me padhi jati hain (fitz.open(stream=...)), disk par kuch
+# nahi likha jata. Sirf REPORT_UPLOAD_MEMORY_LIMIT se badi files temp/ me spill hoti hain.
+# ------------------------------
+REPORT_UPLOAD_MEMORY_LIMIT = int(os.getenv("REPORT_UPLOAD_MEMORY_LIMIT", str(10 * 1024 * 1024)))
+
+
+def read_upload(uploaded_file):
+    """
+    Returns (pdf, temp_path). pdf = bytes, ya badi file ho to uska disk path;
+    temp_path ko kaam ke baad discard_upload() se hatao (memory wale case me None).
+    """
+    if uploaded_file.size <= REPORT_UPLOAD_MEMORY_LIMIT:
+        return uploaded_file.read(), None
+
+    full_path = default_storage.path(default_storage.save(f"temp/{uploaded_file.name}", uploaded_file))
+    return full_path, full_path
+
+
+def discard_upload(temp_path):
+    if temp_path and os.path.exists(temp_path):
+        os.remove(temp_path)
@@ -1,9 +1,13 @@
 from django.urls import path
-from .views import UploadReportView, UserChatBotAPIView, UserReportInstancesView
+from .views import UploadReportView, UserChatBotAPIView, UserReportInstancesView, ReportJobStatusView, ReportMetricsView, StreamUploadReportView, StreamChatBotAPIView
 
 urlpatterns = [
     path('report/', UploadReportView.as_view()),  
+    path('report/stream/', StreamUploadReportView.as_view(), name="report_stream"),
+    path('report/jobs/<uuid:job_id>/', ReportJobStatusView.as_view(), name="report_job_status"),
+    path('metrics/', ReportMetricsView.as_view(), name="report_metrics"),
     path('chatbot/', UserChatBotAPIView.as_view()),
+    path('chatbot/stream/', StreamChatBotAPIView.as_view(), name="chatbot_stream"),
      path("get_user_instances/", UserReportInstancesView.as_view(), name="get_user_instances"),
      path("get_user_instances/<pk>", UserReportInstancesView.as_view(), name="get_user_instances"),
 
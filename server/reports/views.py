@@ -2,26 +2,49 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.core.files.storage import default_storage
+from rest_framework.pagination import CursorPagination
 from authentication.models import User
-from .serializers import ReportInstanceSerializer
-from utils.usercheck import authenticate_request
-import os
-from .models import Report, ChatBot, ReportInstance
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain_openai import ChatOpenAI
+from .serializers import ReportInstanceSerializer, ReportInstanceListSerializer, ReportJobSerializer
+from utils.usercheck import authenticate_request, decode_request_user_id
 import json
-from .models import Report, ReportInstance
-from .agents.extracting_basic_details import extract_report_from_pdf, generate_report_summary as generate_basic_summary
-from .agents.extracting_json_details import extract_medical_from_pdf, generate_report_summary as generate_json_summary
-from .agents.overal_summary import generate_final_summary
-from .agents.yoga_prompt import get_youtube_query
-from .agents.youtube_scrapping import youtube_search
+from .models import Report, ReportInstance, ReportJob, ReportCacheEntry
+from .agents.modes import EXTRACTION_MODES, DEFAULT_EXTRACTION_MODE, SUMMARY_MODES, DEFAULT_SUMMARY_MODE
+from .pipeline import run_report_pipeline
+from .uploads import read_upload, discard_upload
+from .jobs import create_report_job, enqueue_report_job, recover_report_jobs
+from .background import spawn
+from .chat import build_chat_messages, save_chat_turn, get_chat, get_report_excerpts, lookup_cached_reply, store_cached_reply
+from .health import get_health_context
+from .list_cache import get_list_version, list_variant, list_etag, last_modified, is_not_modified, get_cached_body, set_cached_body
+from .recommendations import fill_youtube_videos, schedule_youtube_videos, schedule_missing_youtube_videos
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+import queue
+from .agents.page_cache import page_cache
+from .agents.semantic_cache import CHAT_SEMANTIC_CACHE_ENABLED, get_semantic_cache
+from .agents.structured_output import parse_stats
+from django.db.models import Count, Sum
+def parse_pipeline_modes(request):
+    """Upload ke optional extraction_mode / summary_mode fields. Returns (modes, error)."""
+    modes = {
+        "extraction_mode": request.data.get("extraction_mode") or DEFAULT_EXTRACTION_MODE,
+        "summary_mode": request.data.get("summary_mode") or DEFAULT_SUMMARY_MODE,
+    }
+    if modes["extraction_mode"] not in EXTRACTION_MODES:
+        return None, f"extraction_mode must be one of {list(EXTRACTION_MODES)}"
+    if modes["summary_mode"] not in SUMMARY_MODES:
+        return None, f"summary_mode must be one of {list(SUMMARY_MODES)}"
+    return modes, None
+
+
 class UploadReportView(APIView):
     """
     Upload PDF, extract report details, save to Report & ReportInstance.
+    youtube_videos are filled in the background after the response (see recommendations.py).
     If a report with the same title already exists for the user, only a new instance is created,
     and the report's overall_summary is updated.
+    With async=true the pipeline runs on the background job pool and a job_id is returned
+    immediately; poll ReportJobStatusView for progress.
     """
 
     def post(self, request, format=None):
@@ -32,74 +55,158 @@ class UploadReportView(APIView):
         if not uploaded_file:
             return Response({"error": "No file provided"}, status=status.HTTP_400_BAD_REQUEST)
 
+        modes, error = parse_pipeline_modes(request)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
         # Check if report with same title already exists for the user
         report, created = Report.objects.get_or_create(user=user, title=title)
 
-        # Save the uploaded PDF temporarily
-        temp_path = default_storage.save(f"temp/{uploaded_file.name}", uploaded_file)
-        full_path = default_storage.path(temp_path)
+        # -------------------------------
+        # Async mode: job banao, turant job_id return karo
+        # -------------------------------
+        if str(request.data.get("async", "")).lower() in ("1", "true", "yes"):
+            job = create_report_job(user, report, uploaded_file, **modes)
+            enqueue_report_job(job)
+            return Response({
+                "report_id": report.id,
+                "job_id": str(job.id),
+                "status": job.status,
+                "message": "Report queued for processing.",
+            }, status=status.HTTP_202_ACCEPTED)
+
+        # Upload memory me hi process hota hai (badi file ho to hi temp/ me)
+        pdf, temp_path = read_upload(uploaded_file)
 
         try:
-            # -------------------------------
-            # Extract structured report details
-            # -------------------------------
-            page_reports = extract_report_from_pdf(full_path)
-            structured_json = [r.dict() for r in page_reports]
-            basic_summary = generate_basic_summary(page_reports)
-
-            # -------------------------------
-            # Extract test results JSON
-            # -------------------------------
-            page_results = extract_medical_from_pdf(full_path)
-            test_json = [r.dict() for r in page_results]
-            test_summary = generate_json_summary(page_results)
-
-            # -------------------------------
-            # Polished final summary using OpenAI
-            # -------------------------------
-            final_summary_text = generate_final_summary(
-                basic_details=structured_json[0].get("details") if structured_json else {},
-                summary=f"{basic_summary}\n\n{test_summary}"
-            )
-            youtube_query = get_youtube_query(final_summary_text)
-            youtube_results_json = youtube_search(youtube_query, max_results=5)
-            # -------------------------------
-            # Save ReportInstance (without instance_name)
-            # -------------------------------
-            instance = ReportInstance.objects.create(
-                report=report,
-                file=uploaded_file.name,
-                json={
-                    "structured_details": structured_json,
-                    "test_details": test_json
-                },
-                instance_summary=final_summary_text,
-                youtube_videos=json.loads(youtube_results_json),
-                name_of_the_doctor=page_reports[0].details.doctor_name if page_reports else "",
-                address_of_the_doctor=page_reports[0].details.hospital_address if page_reports else ""
-            )
-
-            # Update Report's overall_summary
-            report.overall_summary = final_summary_text
-            report.save()
+            result = run_report_pipeline(report, pdf, uploaded_file.name, **modes)
+            # YouTube videos response ke baad background me bharenge
+            schedule_youtube_videos(result["instance"].id, result["youtube_query"])
 
             return Response({
                 "report_id": report.id,
-                "instance_id": instance.id,
+                "instance_id": result["instance"].id,
                 "message": "Report uploaded and processed successfully.",
-                "final_summary": final_summary_text,
-                "structured_json": structured_json,
+                "final_summary": result["final_summary"],
+                "structured_json": result["structured_json"],
+                "cached": result["cached"],
             }, status=status.HTTP_200_OK)
 
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         finally:
-            if os.path.exists(full_path):
-                os.remove(full_path)
+            discard_upload(temp_path)
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class StreamUploadReportView(APIView):
+    """
+    Same as UploadReportView, lekin results server-sent events me stream hote hain:
+    stage -> page_details / page_tests (har page ready hote hi) -> summary -> youtube_videos -> done.
+    Failure par ek "error" event aata hai.
+    Stream request ke poore pipeline tak khula rehta hai, isliye gunicorn gthread workers chahiye
+    (Dockerfile); sync worker --timeout ke baad stream aur pipeline dono ko maar deta hai.
+    """
+
+    def post(self, request, format=None):
+        user = authenticate_request(request, need_user=True)
+        title = request.data.get("title", "Untitled Report")
+        uploaded_file = request.FILES.get("file")
+
+        if not uploaded_file:
+            return Response({"error": "No file provided"}, status=status.HTTP_400_BAD_REQUEST)
+
+        modes, error = parse_pipeline_modes(request)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        report, created = Report.objects.get_or_create(user=user, title=title)
+        pdf, temp_path = read_upload(uploaded_file)
+        events = queue.Queue()
+
+        def run():
+            try:
+                result = run_report_pipeline(
+                    report, pdf, uploaded_file.name, **modes,
+                    on_stage=lambda stage, state: events.put(("stage", {"stage": stage, "state": state})),
+                    on_result=lambda name, data: events.put((name, data)),
+                )
+                try:
+                    # Client already stream par hai, to yahin fill karke bhej do
+                    events.put(("youtube_videos", fill_youtube_videos(result["instance"].id, result["youtube_query"])))
+                except Exception as e:
+                    print(f"YouTube recommendations failed: {e}")
+                events.put(("done", {
+                    "report_id": report.id,
+                    "instance_id": result["instance"].id,
+                    "cached": result["cached"],
+                }))
+            except Exception as e:
+                events.put(("error", {"error": str(e)}))
+            finally:
+                discard_upload(temp_path)
+                events.put(None)
+
+        spawn(run)
+
+        def stream():
+            while True:
+                item = events.get()
+                if item is None:
+                    break
+                yield sse_event(*item)
+
+        response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"   # nginx buffering band, warna events atak jate hain
+        return response
+
+
+class ReportJobStatusView(APIView):
+    """
+    GET: background report job ka status + har stage ki progress.
+    Poll par atke hue jobs bhi recover hote hain (worker restart ke baad).
+    """
+
+    def get(self, request, job_id):
+        user = authenticate_request(request, need_user=True)
+        try:
+            recover_report_jobs()
+        except Exception as e:
+            print(f"Report job recovery failed: {e}")
+        try:
+            job = ReportJob.objects.select_related("instance").get(pk=job_id, user=user)
+        except ReportJob.DoesNotExist:
+            return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(ReportJobSerializer(job).data, status=status.HTTP_200_OK)
+
+
+class ReportMetricsView(APIView):
+    """
+    GET (staff only): cache hit/miss counters, dekhne ke liye ki caches kitna bacha rahe hain.
+    Page cache aur Gemini parse counters per worker process hain.
+    """
+
+    def get(self, request):
+        user = authenticate_request(request, need_user=True)
+        if not user.is_staff:
+            return Response({"error": "Staff access required"}, status=status.HTTP_403_FORBIDDEN)
+
+        report_cache = ReportCacheEntry.objects.aggregate(entries=Count("id"), hits=Sum("hit_count"))
+        return Response({
+            "page_cache": page_cache.stats(),
+            "report_cache": {"entries": report_cache["entries"], "hits": report_cache["hits"] or 0},
+            "chat_semantic_cache": get_semantic_cache().stats() if CHAT_SEMANTIC_CACHE_ENABLED else None,
+            # Gemini JSON parse: ok / repaired (ek retry ke baad) / failed, per extractor kind
+            "gemini_parse": parse_stats.stats(),
+        }, status=status.HTTP_200_OK)
 
 
 
-MAX_HISTORY = 10
 
 class UserChatBotAPIView(APIView):
 
@@ -112,62 +219,81 @@ class UserChatBotAPIView(APIView):
         if not user_message:
             return Response({"error": "Message is required"}, status=400)
 
-        # Merge user's report summaries as **background knowledge**
-        reports = Report.objects.filter(user=user)
-        merged_summary = " ".join([r.overall_summary or "" for r in reports])
+        asked_at = timezone.now()
+        health_context = get_health_context(user)
+        report_excerpts = get_report_excerpts(user, user_message)
 
-        # Get or create ChatBot instance
-        chatbot, _ = ChatBot.objects.get_or_create(user=user)
+        # Same health context me milta julta standalone sawal pehle aa chuka ho to LLM call skip
+        reply, question_vector = lookup_cached_reply(user, user_message, health_context, report_excerpts)
+        cached = reply is not None
+        if not cached:
+            messages = build_chat_messages(
+                user, user_message, health_context, report_excerpts, standalone=question_vector is not None
+            )
+            reply = get_chat().invoke(messages).content
+            store_cached_reply(user_message, health_context, report_excerpts, reply, question_vector)
+        save_chat_turn(user, user_message, reply, asked_at)
 
-        # Load existing memory
-        try:
-            history = json.loads(chatbot.memory) if chatbot.memory else []
-        except json.JSONDecodeError:
-            history = []
-
-        # Keep last 10 messages
-        history = history[-MAX_HISTORY:]
-
-        # Build messages for LangChain
-        messages = []
-
-        # System message: background context + instructions
-        system_prompt = (
-            f"You are a helpful personal health assistant. "
-            f"You have access to the user's health information (summarized) "
-            f"for context, but you must never reveal raw report details. "
-            f"Provide advice, suggestions, or answer questions about health, "
-            f"nutrition, and wellbeing in a friendly, personalized way. "
-            f"User's health summary (for reference only, do not show to user): {merged_summary}"
-        )
-        messages.append(SystemMessage(content=system_prompt))
-
-        # Append previous conversation history
-        for msg in history:
-            if msg["role"] == "human":
-                messages.append(HumanMessage(content=msg["content"]))
-            else:
-                messages.append(AIMessage(content=msg["content"]))
-
-        # Append current user message
-        messages.append(HumanMessage(content=user_message))
-
-        # Initialize LangChain chat
-        chat = ChatOpenAI(model="gpt-4")
-        ai_response = chat(messages)
-
-        # Append AI response to history
-        history.append({"role": "human", "content": user_message})
-        history.append({"role": "ai", "content": ai_response.content})
-        history = history[-MAX_HISTORY:]  # keep last 10 messages
-
-        # Save back to ChatBot memory
-        chatbot.memory = json.dumps(history)
-        chatbot.save()
-
-        return Response({"response": ai_response.content})
+        return Response({"response": reply, "cached": cached})
+
+
+class StreamChatBotAPIView(APIView):
+    """
+    Same as UserChatBotAPIView, lekin jawab server-sent events me aata hai:
+    token (har chunk aate hi) -> done {"response": poora jawab}. Failure par "error" event.
+    History poora stream complete hone ke baad hi save hoti hai.
+    """
+
+    def post(self, request):
+        user = authenticate_request(request, need_user=True)
+
+        user_message = request.data.get("message", "").strip()
+        if not user_message:
+            return Response({"error": "Message is required"}, status=400)
+
+        asked_at = timezone.now()
+        health_context = get_health_context(user)
+        report_excerpts = get_report_excerpts(user, user_message)
+        reply, question_vector = lookup_cached_reply(user, user_message, health_context, report_excerpts)
+
+        def cached_stream():
+            save_chat_turn(user, user_message, reply, asked_at)
+            yield sse_event("token", {"content": reply})
+            yield sse_event("done", {"response": reply, "cached": True})
+
+        messages = build_chat_messages(
+            user, user_message, health_context, report_excerpts, standalone=question_vector is not None
+        ) if reply is None else None
+
+        def stream():
+            parts = []
+            try:
+                for chunk in get_chat().stream(messages):
+                    if chunk.content:
+                        parts.append(chunk.content)
+                        yield sse_event("token", {"content": chunk.content})
+            except Exception as e:
+                yield sse_event("error", {"error": str(e)})
+                return
+
+            full_reply = "".join(parts)
+            save_chat_turn(user, user_message, full_reply, asked_at)
+            store_cached_reply(user_message, health_context, report_excerpts, full_reply, question_vector)
+            yield sse_event("done", {"response": full_reply, "cached": False})
+
+        response = StreamingHttpResponse(stream() if reply is None else cached_stream(), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
     
 
+class ReportInstanceCursorPagination(CursorPagination):
+    ordering = "-id"   # newest first; id unique hai to cursor stable rehta hai
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
 class UserReportInstancesView(APIView):
 
 
@@ -184,7 +310,7 @@ class UserReportInstancesView(APIView):
         except User.DoesNotExist:
             return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        instances = ReportInstance.objects.filter(report__user=user)
+        instances = ReportInstance.objects.filter(report__user=user).select_related("report")
         serializer = ReportInstanceSerializer(instances, many=True)
 
         return Response({
@@ -197,29 +323,82 @@ class UserReportInstancesView(APIView):
         GET: 
         - Agar pk diya hai: sirf us report instance ka data return hoga
         - Agar pk nahi diya: sabhi authenticated user ke report instances return honge
+        - `cursor` / `page_size` diya: newest first pages, slim serializer (json nahi), next/previous links
+        - `fields=id,instance_summary,...`: sirf ye fields
+        ETag / Last-Modified bhejta hai; If-None-Match match kare to 304, warna cached body (bina DB query ke).
         """
+        user_id = decode_request_user_id(request)
+        version = get_list_version(user_id)
+        variant = list_variant(request.query_params)
+        etag = list_etag(user_id, version, variant)
+
+        if is_not_modified(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            data = get_cached_body(user_id, version, variant)
+            if data is None:
+                data, error = self._list_data(request)
+                if error is not None:
+                    return error
+                set_cached_body(user_id, version, variant, data)
+            response = Response(data, status=status.HTTP_200_OK)
+
+        response["ETag"] = etag
+        response["Last-Modified"] = last_modified(version)
+        response["Cache-Control"] = "private, no-cache"   # har baar revalidate karo
+        return response
+
+    def _list_data(self, request):
+        """Returns (data, None) ya (None, error Response)."""
         user = authenticate_request(request, need_user=True)
         if not user:
-            return Response({"error": "Authentication failed"}, status=status.HTTP_401_UNAUTHORIZED)
+            return None, Response({"error": "Authentication failed"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        fields = request.query_params.get("fields")
+        fields = [name.strip() for name in fields.split(",") if name.strip()] if fields else None
 
         pk = request.query_params.get("pk")  # GET query parameter
         if pk:
             try:
-                instance = ReportInstance.objects.get(pk=pk, report__user=user)
+                instance = ReportInstance.objects.select_related("report").get(pk=pk, report__user=user)
             except ReportInstance.DoesNotExist:
-                return Response({"error": "Report instance not found"}, status=status.HTTP_404_NOT_FOUND)
+                return None, Response({"error": "Report instance not found"}, status=status.HTTP_404_NOT_FOUND)
             
-            serializer = ReportInstanceSerializer(instance)
-            return Response({
+            schedule_missing_youtube_videos([instance])
+            try:
+                serializer = ReportInstanceSerializer(instance, fields=fields)
+            except ValueError as e:
+                return None, Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return {
                 "email": user.email,
                 "report_instance": serializer.data
-            }, status=status.HTTP_200_OK)
+            }, None
         
         # Agar pk nahi diya, sabhi instances return karo
-        instances = ReportInstance.objects.filter(report__user=user)
-        serializer = ReportInstanceSerializer(instances, many=True)
+        instances = ReportInstance.objects.filter(report__user=user).select_related("report")
+        paginated = "cursor" in request.query_params or "page_size" in request.query_params
+
+        if paginated:
+            # Slim list: json tabhi load/serialize hota hai jab fields me explicitly manga ho
+            serializer_class = ReportInstanceSerializer if fields else ReportInstanceListSerializer
+            if not fields or "json" not in fields:
+                instances = instances.defer("json")
+            paginator = ReportInstanceCursorPagination()
+            instances = paginator.paginate_queryset(instances, request, view=self)
+        else:
+            serializer_class = ReportInstanceSerializer
 
-        return Response({
+        try:
+            serializer = serializer_class(instances, many=True, fields=fields)
+        except ValueError as e:
+            return None, Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        schedule_missing_youtube_videos(instances)
+
+        data = {
             "email": user.email,
             "report_instances": serializer.data
-        }, status=status.HTTP_200_OK)
+        }
+        if paginated:
+            data["next"] = paginator.get_next_link()
+            data["previous"] = paginator.get_previous_link()
+        return data, None
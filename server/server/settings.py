@@ -147,7 +147,14 @@ CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'unique-snowflake',
-    }
+    },
+    # Saare gunicorn workers ke beech shared (locmem har worker ka alag hota hai)
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('SHARED_CACHE_DIR', str(BASE_DIR / 'shared_cache')),
+        # Default 300 entries par random culling per-user list version keys bhi uda deti hai (ETag badalte rehte)
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('SHARED_CACHE_MAX_ENTRIES', '20000'))},
+    },
 }
 
 
@@ -9,11 +9,12 @@ load_dotenv()
 # ------------------------
 # Utility for Auth
 # ------------------------
-def authenticate_request(request, need_user=False):
+def decode_request_user_id(request):
+    """
+    Sirf JWT verify karke user id do, DB query ke bina (cached responses ke liye).
+    User ka existence check caller ko karna ho to authenticate_request use karo.
+    """
     token = request.headers.get('Authorization')
-    if not need_user:
-        return None
-
     if not token:
         raise AuthenticationFailed('Unauthenticated!')
     try:
@@ -22,8 +23,14 @@ def authenticate_request(request, need_user=False):
         raise AuthenticationFailed('Token expired!')
     except jwt.InvalidTokenError:
         raise AuthenticationFailed('Invalid token!')
+    return payload['id']
+
+
+def authenticate_request(request, need_user=False):
+    if not need_user:
+        return None
 
-    user = User.objects.filter(id=payload['id']).first()
+    user = User.objects.filter(id=decode_request_user_id(request)).first()
     if not user:
         raise AuthenticationFailed('User not found!')
 